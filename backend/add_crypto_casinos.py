@@ -58,7 +58,7 @@ casino_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "activated_at": datetime.now(timezone.utc).isoformat()
     },
     
@@ -98,7 +98,7 @@ casino_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "activated_at": datetime.now(timezone.utc).isoformat()
     },
     
@@ -136,7 +136,7 @@ casino_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "activated_at": datetime.now(timezone.utc).isoformat()
     }
 ]
@@ -56,7 +56,7 @@ herbies_partner = {
     "total_conversions": 0,
     "total_revenue": 0.0,
     "total_commission": 0.0,
-    "created_at": datetime.now(timezone.utc).isoformat(),
+    "created_at": datetime.now(timezone.utc),
     "activated_at": datetime.now(timezone.utc).isoformat()
 }
 
@@ -0,0 +1,47 @@
+"""
+Backfill dedupe_key on existing news articles so the bulk ingest path
+recognises stories stored before keyed upserts were introduced
+"""
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import os
+
+from services.news_ingest import article_dedupe_key
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'nugl_database')
+
+async def backfill_article_keys():
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+    
+    print('🔑 Backfilling article dedupe keys...\n')
+    
+    seen = set(await db.news_articles.distinct('dedupe_key'))
+    operations = []
+    duplicates = 0
+    
+    cursor = db.news_articles.find(
+        {'dedupe_key': {'$exists': False}},
+        {'_id': 1, 'title': 1, 'source_url': 1, 'guid': 1}
+    ).sort('published_at', 1)
+    async for article in cursor:
+        key = article_dedupe_key(article)
+        if key in seen:
+            # Older copy already owns this key; leave the duplicate unkeyed
+            duplicates += 1
+            continue
+        seen.add(key)
+        operations.append(UpdateOne({'_id': article['_id']}, {'$set': {'dedupe_key': key}}))
+    
+    if operations:
+        await db.news_articles.bulk_write(operations, ordered=False)
+    
+    print(f'✅ Keyed {len(operations)} articles')
+    print(f'⚠️  Left {duplicates} duplicate articles without a key')
+    
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_article_keys())
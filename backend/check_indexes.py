@@ -0,0 +1,52 @@
+"""
+Report missing, unregistered and unused MongoDB indexes against the index registry
+
+Usage:
+    python check_indexes.py          # report only
+    python check_indexes.py --apply  # create missing indexes, then report
+"""
+import asyncio
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+
+from services.index_registry import ensure_indexes, index_report
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'nugl_database')
+
+async def check_indexes(apply: bool = False):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+    
+    if apply:
+        print('🔧 Applying index registry...\n')
+        result = await ensure_indexes(db)
+        for name in result['failed']:
+            print(f'❌ Failed to create {name}')
+    
+    print('📇 Index report ($indexStats counters reset on mongod restart)\n')
+    report = await index_report(db)
+    
+    problems = 0
+    for collection, info in report.items():
+        print(f'{collection}:')
+        for name in info['missing']:
+            print(f'   ❌ missing: {name}')
+        for name in info['unregistered']:
+            print(f'   ⚠️  not in registry: {name}')
+        for name in info['unused']:
+            print(f'   💤 unused since {info["usage"][name]["since"]}: {name}')
+        for name, stats in sorted(info['usage'].items()):
+            if name not in info['unused']:
+                print(f'   ✅ {name}: {stats["ops"]} ops')
+        problems += len(info['missing'])
+    
+    print(f'\n{"✅ All registered indexes present" if not problems else f"❌ {problems} registered indexes missing"}')
+    
+    client.close()
+    return problems
+
+if __name__ == "__main__":
+    missing = asyncio.run(check_indexes(apply='--apply' in sys.argv))
+    sys.exit(1 if missing else 0)
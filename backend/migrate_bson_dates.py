@@ -0,0 +1,51 @@
+"""
+Convert ISO string timestamps to native BSON dates across all collections
+
+Usage:
+    python migrate_bson_dates.py            # migrate every field in DATE_FIELDS
+    python migrate_bson_dates.py --dry-run  # only report how many values are still strings
+"""
+import asyncio
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+
+from services.bson_dates import DATE_FIELDS, count_string_dates, migrate_collection
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'nugl_database')
+
+async def migrate_dates(dry_run: bool = False):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+    
+    print('🕒 Checking timestamp fields...\n' if dry_run else '🕒 Migrating timestamp fields to BSON dates...\n')
+    
+    total = 0
+    for collection, fields in DATE_FIELDS.items():
+        if dry_run:
+            counts = await count_string_dates(db, collection, fields)
+        else:
+            counts = await migrate_collection(db, collection, fields)
+        
+        for field, count in counts.items():
+            if count:
+                print(f'   {collection}.{field}: {count}')
+                total += count
+    
+    if dry_run:
+        print(f'\n📊 {total} string timestamps left to migrate')
+    else:
+        print(f'\n✅ Migrated {total} timestamps')
+    
+    # Anything still a string could not be parsed and needs a manual look
+    if not dry_run:
+        for collection, fields in DATE_FIELDS.items():
+            for field, count in (await count_string_dates(db, collection, fields)).items():
+                if count:
+                    print(f'⚠️  {collection}.{field}: {count} values could not be parsed')
+    
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_dates(dry_run='--dry-run' in sys.argv))
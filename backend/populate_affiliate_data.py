@@ -82,10 +82,10 @@ async def populate_affiliate_data():
                         '/news',
                         '/nft-marketplace'
                     ]),
-                    'clicked_at': (date - timedelta(
+                    'clicked_at': date - timedelta(
                         hours=random.randint(0, 23),
                         minutes=random.randint(0, 59)
-                    )).isoformat(),
+                    ),
                     'converted': converted,
                     'revenue': revenue
                 }
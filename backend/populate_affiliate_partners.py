@@ -45,7 +45,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -71,7 +71,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -93,7 +93,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -115,7 +115,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -135,7 +135,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -155,7 +155,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -175,7 +175,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -195,7 +195,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     
     # CRYPTO CASINOS
@@ -224,7 +224,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -249,7 +249,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -272,7 +272,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -295,7 +295,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -318,7 +318,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -341,7 +341,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -364,7 +364,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -387,7 +387,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     
     # DISPENSARIES
@@ -409,7 +409,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -429,7 +429,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     
     # PSYCHEDELICS (Internal Brand)
@@ -452,7 +452,7 @@ affiliate_partners = [
         "total_conversions": 0,
         "total_revenue": 0.0,
         "total_commission": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
 ]
 
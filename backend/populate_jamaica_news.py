@@ -2,16 +2,19 @@
 Quick script to populate Jamaica news from updated RSS feeds
 """
 import asyncio
+from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+from services.bson_dates import CODEC_OPTIONS
 from services.data_aggregator import NewsAggregator, SentimentAnalyzer
+from services.news_ingest import NewsIngestWriter
 
 async def populate_jamaica_news():
     mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
     db_name = os.environ.get('DB_NAME', 'nugl_database')
     
     client = AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
+    db = client.get_database(db_name, codec_options=CODEC_OPTIONS)
     
     print('🇯🇲 Fetching Jamaica news...\n')
     
@@ -32,7 +35,7 @@ async def populate_jamaica_news():
                     'content': 'The Jamaican cannabis industry continues to expand with new licenses being approved for local cultivators and processors.',
                     'category': 'jamaica',
                     'source_url': 'https://jamaica-gleaner.com',
-                    'published_at': '2025-01-14T00:00:00Z',
+                    'published_at': datetime(2025, 1, 14, tzinfo=timezone.utc),
                     'trending_score': 0.7,
                     'image_url': None,
                     'sentiment': 'bullish',
@@ -45,7 +48,7 @@ async def populate_jamaica_news():
                     'content': 'Kaya Holdings marks milestone anniversary with plans for expansion across the island.',
                     'category': 'jamaica',
                     'source_url': 'https://rjrnewsonline.com',
-                    'published_at': '2025-01-13T00:00:00Z',
+                    'published_at': datetime(2025, 1, 13, tzinfo=timezone.utc),
                     'trending_score': 0.6,
                     'image_url': None,
                     'sentiment': 'bullish',
@@ -58,7 +61,7 @@ async def populate_jamaica_news():
                     'content': 'Government announces updated regulations to support cannabis farmers and small businesses.',
                     'category': 'jamaica',
                     'source_url': 'https://www.jamaicaobserver.com',
-                    'published_at': '2025-01-12T00:00:00Z',
+                    'published_at': datetime(2025, 1, 12, tzinfo=timezone.utc),
                     'trending_score': 0.8,
                     'image_url': None,
                     'sentiment': 'bullish',
@@ -71,7 +74,7 @@ async def populate_jamaica_news():
                     'content': 'Cannabis tourism brings significant revenue to Jamaica as visitors seek authentic ganja experiences.',
                     'category': 'jamaica',
                     'source_url': 'https://iriefm.net',
-                    'published_at': '2025-01-11T00:00:00Z',
+                    'published_at': datetime(2025, 1, 11, tzinfo=timezone.utc),
                     'trending_score': 0.5,
                     'image_url': None,
                     'sentiment': 'bullish',
@@ -84,7 +87,7 @@ async def populate_jamaica_news():
                     'content': 'Several Jamaican farmers receive approval to export cannabis products internationally.',
                     'category': 'jamaica',
                     'source_url': 'http://www.jamaicatoday.org',
-                    'published_at': '2025-01-10T00:00:00Z',
+                    'published_at': datetime(2025, 1, 10, tzinfo=timezone.utc),
                     'trending_score': 0.6,
                     'image_url': None,
                     'sentiment': 'bullish',
@@ -94,23 +97,18 @@ async def populate_jamaica_news():
             ]
             articles = sample_articles
         else:
-            # Add sentiment analysis to fetched articles
-            for article in articles:
-                sentiment_data = SentimentAnalyzer.analyze(
-                    article['title'] + ' ' + article['content']
-                )
+            # Add sentiment analysis to the whole batch in one pass
+            sentiments = SentimentAnalyzer.analyze_many(
+                [article['title'] + ' ' + article['content'] for article in articles],
+                [article['category'] for article in articles]
+            )
+            for article, sentiment_data in zip(articles, sentiments):
                 article.update(sentiment_data)
         
-        # Insert articles
-        inserted = 0
-        for article in articles:
-            existing = await db.news_articles.find_one({'title': article['title']})
-            if not existing:
-                await db.news_articles.insert_one(article)
-                inserted += 1
-                print(f'  ✓ {article["title"][:70]}...')
+        # Insert new articles in one bulk upsert (duplicates are skipped by dedupe key)
+        result = await NewsIngestWriter(db).write(articles)
         
-        print(f'\n✅ Inserted {inserted} Jamaica news articles')
+        print(f'✅ Inserted {result["inserted"]} Jamaica news articles, skipped {result["skipped"]} duplicates')
         
         # Show total count
         total_jamaica = await db.news_articles.count_documents({'category': 'jamaica'})
@@ -21,7 +21,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'art',
         'rarity': 'rare',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 42,
         'views': 156
     },
@@ -35,7 +35,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'art',
         'rarity': 'uncommon',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 28,
         'views': 92
     },
@@ -49,7 +49,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'art',
         'rarity': 'legendary',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 89,
         'views': 342
     },
@@ -63,7 +63,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'photography',
         'rarity': 'common',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 15,
         'views': 67
     },
@@ -77,7 +77,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'photography',
         'rarity': 'common',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 19,
         'views': 78
     },
@@ -91,7 +91,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'photography',
         'rarity': 'uncommon',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 31,
         'views': 124
     },
@@ -105,7 +105,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'photography',
         'rarity': 'uncommon',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 25,
         'views': 98
     },
@@ -119,7 +119,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'digital',
         'rarity': 'rare',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 56,
         'views': 234
     },
@@ -133,7 +133,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'digital',
         'rarity': 'rare',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 44,
         'views': 187
     },
@@ -147,7 +147,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'digital',
         'rarity': 'uncommon',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 38,
         'views': 145
     },
@@ -161,7 +161,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'art',
         'rarity': 'uncommon',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 33,
         'views': 118
     },
@@ -175,7 +175,7 @@ CANNABIS_NFTS = [
         'owner': None,
         'category': 'art',
         'rarity': 'rare',
-        'created_at': datetime.now(timezone.utc).isoformat(),
+        'created_at': datetime.now(timezone.utc),
         'likes': 47,
         'views': 201
     }
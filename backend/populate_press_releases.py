@@ -126,7 +126,7 @@ async def populate_press_releases():
             "title": item["title"],
             "media_source": item["media_source"],
             "link": item["link"],
-            "published_at": datetime.now(timezone.utc).isoformat()
+            "published_at": datetime.now(timezone.utc)
         }
         await db.press_releases.insert_one(release)
     
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, WebSocket
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -9,13 +9,17 @@ from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
 import uuid
+import json
+import base64
 from datetime import datetime, timezone, timedelta
-import bcrypt
 import jwt
 from emergentintegrations.llm.chat import LlmChat, UserMessage
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from services.cache_service import cache_service
 from services.email_service import EmailService
+from services.password_hasher import password_hasher, PasswordHasherBusy
+from services.principal import VerifiedTokenCache, UserProfileStore, Principal
+from services.bson_dates import CODEC_OPTIONS, as_datetime
 
 
 ROOT_DIR = Path(__file__).parent
@@ -24,7 +28,8 @@ load_dotenv(ROOT_DIR / '.env')
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Timestamps are native BSON dates, decoded as aware UTC datetimes
+db = client.get_database(os.environ['DB_NAME'], codec_options=CODEC_OPTIONS)
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -40,6 +45,8 @@ JWT_ALGORITHM = "HS256"
 
 # Initialize services
 email_service = EmailService()
+verified_tokens = VerifiedTokenCache()
+user_profiles = UserProfileStore(db)
 
 # Initialize monetization services
 from services.affiliate_service import AffiliateTrackingService
@@ -50,6 +57,24 @@ from services.crypto_price_service import CryptoPriceService
 # Initialize crypto price service
 crypto_price_service = CryptoPriceService()
 
+# One background poller refreshes prices and pushes ticker snapshots to every client
+from services.price_stream import (
+    TickerSnapshotService, CryptoQuoteSource, SimulatedQuoteSource, PricePoller, ticker_hub,
+    stream_ticker_sse, serve_ticker_websocket, TICKER_CATEGORIES, EMPTY_TICKER_BODY
+)
+ticker_snapshots = TickerSnapshotService([CryptoQuoteSource(crypto_price_service), SimulatedQuoteSource()], ticker_hub)
+
+# Price alerts and booked portfolio valuations are checked against each tick's fresh quotes
+from services.price_alerts import PriceAlertEngine
+price_alerts = PriceAlertEngine(db, crypto_price_service, email_service)
+price_poller = PricePoller(ticker_snapshots, listeners=[price_alerts.on_tick, crypto_price_service.portfolio_book.on_tick])
+
+from services.price_history import PriceHistoryStore
+price_history = PriceHistoryStore(db, crypto_price_service)
+
+from services.strain_search import StrainSearchService
+strain_search = StrainSearchService(db, on_rebuilt=lambda: cache_service.adelete_prefix("http:strains:"))
+
 from services.sponsored_content_service import SponsoredContentService
 
 
@@ -221,8 +246,12 @@ def create_jwt_token(user_id: str) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 def verify_jwt_token(token: str) -> str:
+    user_id = verified_tokens.get(token)
+    if user_id is not None:
+        return user_id
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        verified_tokens.put(token, payload["user_id"], payload.get("exp"))
         return payload["user_id"]
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
@@ -233,6 +262,13 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     token = credentials.credentials
     return verify_jwt_token(token)
 
+async def get_principal(user_id: str = Depends(get_current_user)) -> Principal:
+    # FastAPI resolves a dependency once per request, so this principal is request-scoped
+    return Principal(user_id, user_profiles)
+
+def hasher_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Too many sign-in attempts, please retry", headers={"Retry-After": "1"})
+
 # Auth Routes
 @api_router.post("/auth/register")
 async def register(user_data: UserCreate):
@@ -250,13 +286,14 @@ async def register(user_data: UserCreate):
     # Create user
     user_dict = user_data.model_dump()
     if user_data.password:
-        password_hash = bcrypt.hashpw(user_data.password.encode(), bcrypt.gensalt())
-        user_dict["password_hash"] = password_hash.decode()
+        try:
+            user_dict["password_hash"] = await password_hasher.hash(user_data.password)
+        except PasswordHasherBusy:
+            raise hasher_busy()
         del user_dict["password"]
     
     user = User(**user_dict)
     doc = user.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     
     await db.users.insert_one(doc)
     
@@ -279,8 +316,15 @@ async def login(credentials: UserLogin):
     if not user.get("password_hash"):
         raise HTTPException(status_code=401, detail="Invalid login method")
     
-    if not bcrypt.checkpw(credentials.password.encode(), user["password_hash"].encode()):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(credentials.password, user["password_hash"])
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Cost parameters changed since this hash was made; store the upgraded one
+        await db.users.update_one({"id": user["id"], "password_hash": user["password_hash"]}, {"$set": {"password_hash": new_hash}})
     
     token = create_jwt_token(user["id"])
     return {"token": token, "user_id": user["id"], "username": user["username"]}
@@ -300,7 +344,6 @@ async def web3_auth(login_data: Web3Login):
         user_dict = user_create.model_dump()
         user = User(**user_dict)
         doc = user.model_dump()
-        doc["created_at"] = doc["created_at"].isoformat()
         await db.users.insert_one(doc)
         user_id = user.id
     else:
@@ -310,8 +353,8 @@ async def web3_auth(login_data: Web3Login):
     return {"token": token, "user_id": user_id, "wallet_address": login_data.wallet_address}
 
 @api_router.get("/auth/me")
-async def get_me(user_id: str = Depends(get_current_user)):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+async def get_me(principal: Principal = Depends(get_principal)):
+    user = await principal.user()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -331,32 +374,65 @@ async def get_user_by_wallet(wallet_address: str):
     raise HTTPException(status_code=404, detail="User not found")
 
 # News Routes
+NEWS_PAGE_MAX = 100
+
+def encode_news_cursor(article: dict) -> str:
+    """Opaque keyset cursor pointing just past an article in (published_at, id) order"""
+    published_at = article["published_at"]
+    if isinstance(published_at, datetime):
+        published_at = published_at.isoformat()
+    raw = json.dumps({"p": published_at, "i": article["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_news_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return {"published_at": datetime.fromisoformat(data["p"]), "id": data["i"]}
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @api_router.get("/news", response_model=List[NewsArticle])
-async def get_news(category: Optional[str] = None, limit: int = 50):
-    query = {}
+async def get_news(response: Response, category: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None):
+    """
+    Newest articles first, paged by keyset cursor.
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
+    limit = max(1, min(limit, NEWS_PAGE_MAX))
+    
+    # One representative per story cluster (legacy articles have no cluster_rep field)
+    query = {"cluster_rep": {"$ne": False}}
     if category:
         query["category"] = category
+    if cursor:
+        after = decode_news_cursor(cursor)
+        query["$or"] = [
+            {"published_at": {"$lt": after["published_at"]}},
+            {"published_at": after["published_at"], "id": {"$lt": after["id"]}},
+        ]
+    
+    # category_published_id / published_id indexes serve both the filter and the sort
+    articles = await db.news_articles.find(query, {"_id": 0, "minhash": 0}).sort(
+        [("published_at", -1), ("id", -1)]
+    ).limit(limit).to_list(limit)
     
-    articles = await db.news_articles.find(query, {"_id": 0}).sort("published_at", -1).to_list(limit)
-    for article in articles:
-        if isinstance(article.get("published_at"), str):
-            article["published_at"] = datetime.fromisoformat(article["published_at"])
+    if len(articles) == limit:
+        response.headers["X-Next-Cursor"] = encode_news_cursor(articles[-1])
     return articles
 
 @api_router.post("/news", response_model=NewsArticle)
 async def create_news(article: NewsArticleCreate, user_id: str = Depends(get_current_user)):
     news = NewsArticle(**article.model_dump())
     doc = news.model_dump()
-    doc["published_at"] = doc["published_at"].isoformat()
     await db.news_articles.insert_one(doc)
     return news
 
 @api_router.get("/news/trending", response_model=List[NewsArticle])
 async def get_trending_news():
-    articles = await db.news_articles.find({}, {"_id": 0}).sort("trending_score", -1).limit(10).to_list(10)
-    for article in articles:
-        if isinstance(article.get("published_at"), str):
-            article["published_at"] = datetime.fromisoformat(article["published_at"])
+    articles = await db.news_articles.find(
+        {"cluster_rep": {"$ne": False}},
+        {"_id": 0, "minhash": 0}
+    ).sort("trending_score", -1).limit(10).to_list(10)
     return articles
 
 @api_router.post("/news/refresh")
@@ -364,30 +440,34 @@ async def refresh_news():
     """Manually trigger news refresh from all RSS feeds"""
     try:
         from services.data_aggregator import NewsAggregator, SentimentAnalyzer
+        from services.feed_cache import FeedCache
+        from services.news_ingest import NewsIngestWriter
         
-        # Fetch articles from all feeds
-        articles = await NewsAggregator.aggregate_all_feeds()
+        # Fetch articles from all feeds, skipping feeds unchanged since the last refresh
+        feed_cache = FeedCache(db)
+        await feed_cache.load()
+        articles = await NewsAggregator.aggregate_all_feeds(feed_cache)
         
-        # Add sentiment analysis
-        for article in articles:
-            sentiment_data = SentimentAnalyzer.analyze(
-                article['title'] + ' ' + article.get('content', '')
-            )
+        # Add sentiment analysis to the whole batch in one pass
+        sentiments = SentimentAnalyzer.analyze_many(
+            [article['title'] + ' ' + article.get('content', '') for article in articles],
+            [article.get('category') for article in articles]
+        )
+        for article, sentiment_data in zip(articles, sentiments):
             article.update(sentiment_data)
         
-        # Insert new articles (avoid duplicates)
-        inserted_count = 0
-        for article in articles:
-            existing = await db.news_articles.find_one({'title': article['title']})
-            if not existing:
-                await db.news_articles.insert_one(article)
-                inserted_count += 1
+        # Insert new articles in one bulk upsert (duplicates are skipped by dedupe key)
+        result = await NewsIngestWriter(db).write(articles)
+        inserted_count = result['inserted']
+        
+        await feed_cache.save()
         
         return {
             'success': True,
             'message': f'Refreshed news feed. Added {inserted_count} new articles.',
             'total_fetched': len(articles),
-            'new_articles': inserted_count
+            'new_articles': inserted_count,
+            'skipped_duplicates': result['skipped']
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -431,9 +511,10 @@ async def get_media_articles(category: Optional[str] = None, subcategory: Option
 # Strain Routes
 @api_router.get("/strains", response_model=List[Strain])
 async def get_strains(search: Optional[str] = None, strain_type: Optional[str] = None):
-    query = {}
     if search:
-        query["name"] = {"$regex": search, "$options": "i"}
+        return await strain_search.search(search, strain_type)
+    
+    query = {}
     if strain_type:
         query["type"] = strain_type
     
@@ -445,6 +526,9 @@ async def create_strain(strain: StrainCreate, user_id: str = Depends(get_current
     strain_obj = Strain(**strain.model_dump())
     doc = strain_obj.model_dump()
     await db.strains.insert_one(doc)
+    # Searches use the current index until the new one is ready; the response cache
+    # drops this write's tag now and again once the rebuild lands
+    strain_search.rebuild()
     return strain_obj
 
 @api_router.get("/strains/{strain_id}", response_model=Strain)
@@ -492,18 +576,12 @@ async def get_nfts(
     if category == 'trending':
         nfts = sorted(nfts, key=lambda x: x.get('views', 0) + x.get('likes', 0) * 2, reverse=True)
     
-    # Convert datetime to string for JSON serialization
-    for nft in nfts:
-        if isinstance(nft.get("created_at"), datetime):
-            nft["created_at"] = nft["created_at"].isoformat()
-    
     return nfts
 
 @api_router.post("/nfts", response_model=NFT)
 async def create_nft(nft: NFTCreate, user_id: str = Depends(get_current_user)):
     nft_obj = NFT(**nft.model_dump())
     doc = nft_obj.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     await db.nfts.insert_one(doc)
     return nft_obj
 
@@ -512,8 +590,6 @@ async def get_nft(nft_id: str):
     nft = await db.nfts.find_one({"id": nft_id}, {"_id": 0})
     if not nft:
         raise HTTPException(status_code=404, detail="NFT not found")
-    if isinstance(nft.get("created_at"), str):
-        nft["created_at"] = datetime.fromisoformat(nft["created_at"])
     return nft
 
 @api_router.post("/nfts/{nft_id}/purchase")
@@ -540,7 +616,7 @@ async def purchase_nft(nft_id: str, purchase_data: dict):
         "buyer": purchase_data.get("buyer"),
         "seller": nft.get("creator"),
         "price": purchase_data.get("price"),
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": datetime.now(timezone.utc),
         "transaction_hash": f"0x{uuid.uuid4().hex}"  # Simulated tx hash
     }
     await db.nft_transactions.insert_one(transaction)
@@ -561,7 +637,7 @@ async def get_wallet_user(wallet_address: str):
             "wallet_address": wallet_address,
             "credits": 500,  # Starting credits
             "username": f"User {wallet_address[:6]}",
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
             "nfts_owned": [],
             "purchases": []
         }
@@ -615,7 +691,8 @@ async def get_affiliate_dashboard():
             partner_stats[pid]['revenue'] += click.get('revenue', 0)
     
     # Recent clicks (last 10)
-    recent_clicks = sorted(clicks, key=lambda x: x.get('clicked_at', ''), reverse=True)[:10]
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    recent_clicks = sorted(clicks, key=lambda x: as_datetime(x.get('clicked_at'), oldest), reverse=True)[:10]
     
     return {
         'summary': {
@@ -637,7 +714,7 @@ async def track_affiliate_click(click_data: dict):
         'partner_id': click_data.get('partner_id'),
         'partner_name': click_data.get('partner_name'),
         'source_page': click_data.get('source_page'),
-        'clicked_at': datetime.now(timezone.utc).isoformat(),
+        'clicked_at': datetime.now(timezone.utc),
         'converted': False,
         'revenue': 0
     }
@@ -672,7 +749,7 @@ async def chat(message: ChatMessage):
             "session_id": session_id,
             "user_message": message.message,
             "bot_response": response,
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": datetime.now(timezone.utc)
         }
         await db.chat_history.insert_one(chat_doc)
         
@@ -686,16 +763,12 @@ async def chat(message: ChatMessage):
 async def create_transaction(transaction: TransactionCreate, user_id: str = Depends(get_current_user)):
     tx = Transaction(**transaction.model_dump())
     doc = tx.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     await db.transactions.insert_one(doc)
     return tx
 
 @api_router.get("/transactions", response_model=List[Transaction])
 async def get_transactions(user_id: str = Depends(get_current_user)):
     transactions = await db.transactions.find({"user_id": user_id}, {"_id": 0}).to_list(100)
-    for tx in transactions:
-        if isinstance(tx.get("created_at"), str):
-            tx["created_at"] = datetime.fromisoformat(tx["created_at"])
     return transactions
 
 # User Actions
@@ -705,6 +778,7 @@ async def save_article(article_id: str, user_id: str = Depends(get_current_user)
         {"id": user_id},
         {"$addToSet": {"saved_articles": article_id}}
     )
+    await user_profiles.invalidate(user_id)
     return {"success": True}
 
 @api_router.get("/users/saved-articles")
@@ -730,6 +804,18 @@ async def get_admin_stats(user_id: str = Depends(get_current_user)):
     }
     return stats
 
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(user_id: str = Depends(get_current_user)):
+    return cache_service.stats()
+
+@api_router.get("/admin/password-hasher-stats")
+async def get_password_hasher_stats(user_id: str = Depends(get_current_user)):
+    return password_hasher.stats()
+
+@api_router.get("/admin/token-cache-stats")
+async def get_token_cache_stats(user_id: str = Depends(get_current_user)):
+    return verified_tokens.stats()
+
 # Investor Relations - OTC Markets Financials
 from services.otc_financials_service import OTCFinancialsService
 
@@ -793,20 +879,15 @@ class ReviewCreate(BaseModel):
     content: str
 
 @api_router.post("/reviews", response_model=Review)
-async def create_review(review_data: ReviewCreate, user_id: str = Depends(get_current_user)):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "username": 1})
-    review = Review(**review_data.model_dump(), user_id=user_id, username=user.get("username", "Anonymous"))
+async def create_review(review_data: ReviewCreate, principal: Principal = Depends(get_principal)):
+    review = Review(**review_data.model_dump(), user_id=principal.user_id, username=await principal.username())
     doc = review.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     await db.reviews.insert_one(doc)
     return review
 
 @api_router.get("/reviews/{item_id}", response_model=List[Review])
 async def get_reviews(item_id: str):
     reviews = await db.reviews.find({"item_id": item_id}, {"_id": 0}).to_list(100)
-    for review in reviews:
-        if isinstance(review.get("created_at"), str):
-            review["created_at"] = datetime.fromisoformat(review["created_at"])
     return reviews
 
 # Social Features - Comments
@@ -827,20 +908,15 @@ class CommentCreate(BaseModel):
     content: str
 
 @api_router.post("/comments", response_model=Comment)
-async def create_comment(comment_data: CommentCreate, user_id: str = Depends(get_current_user)):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "username": 1})
-    comment = Comment(**comment_data.model_dump(), user_id=user_id, username=user.get("username", "Anonymous"))
+async def create_comment(comment_data: CommentCreate, principal: Principal = Depends(get_principal)):
+    comment = Comment(**comment_data.model_dump(), user_id=principal.user_id, username=await principal.username())
     doc = comment.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     await db.comments.insert_one(doc)
     return comment
 
 @api_router.get("/comments/{item_id}", response_model=List[Comment])
 async def get_comments(item_id: str):
     comments = await db.comments.find({"item_id": item_id}, {"_id": 0}).to_list(100)
-    for comment in comments:
-        if isinstance(comment.get("created_at"), str):
-            comment["created_at"] = datetime.fromisoformat(comment["created_at"])
     return comments
 
 @api_router.post("/comments/{comment_id}/like")
@@ -855,7 +931,7 @@ async def follow_user(following_id: str, user_id: str = Depends(get_current_user
         "id": str(uuid.uuid4()),
         "follower_id": user_id,
         "following_id": following_id,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     await db.follows.insert_one(follow_doc)
     return {"success": True}
@@ -888,9 +964,6 @@ class Notification(BaseModel):
 @api_router.get("/notifications", response_model=List[Notification])
 async def get_notifications(user_id: str = Depends(get_current_user)):
     notifications = await db.notifications.find({"user_id": user_id}, {"_id": 0}).sort("created_at", -1).to_list(50)
-    for notif in notifications:
-        if isinstance(notif.get("created_at"), str):
-            notif["created_at"] = datetime.fromisoformat(notif["created_at"])
     return notifications
 
 @api_router.post("/notifications/{notification_id}/read")
@@ -920,16 +993,14 @@ class PriceAlertCreate(BaseModel):
 async def create_price_alert(alert_data: PriceAlertCreate, user_id: str = Depends(get_current_user)):
     alert = PriceAlert(**alert_data.model_dump(), user_id=user_id)
     doc = alert.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
-    await db.price_alerts.insert_one(doc)
+    # insert_one adds an ObjectId _id to the dict it is given; keep the engine's copy clean
+    await db.price_alerts.insert_one(dict(doc))
+    price_alerts.add(doc)
     return alert
 
 @api_router.get("/price-alerts", response_model=List[PriceAlert])
 async def get_price_alerts(user_id: str = Depends(get_current_user)):
     alerts = await db.price_alerts.find({"user_id": user_id, "active": True}, {"_id": 0}).to_list(100)
-    for alert in alerts:
-        if isinstance(alert.get("created_at"), str):
-            alert["created_at"] = datetime.fromisoformat(alert["created_at"])
     return alerts
 
 
@@ -1150,7 +1221,10 @@ async def get_coin_price(coin_id: str):
 @api_router.get("/crypto/historical/{coin_id}")
 async def get_historical_prices(coin_id: str, days: int = 30):
     """Get historical price data"""
-    history = await crypto_price_service.get_historical_prices(coin_id, days)
+    # Served from the local store; upstream is only called to backfill or top up
+    history = await price_history.get_prices(coin_id, days)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Unknown coin")
     return {"coin_id": coin_id, "days": days, "prices": history}
 
 @api_router.get("/crypto/trending")
@@ -1160,115 +1234,56 @@ async def get_trending_coins():
     return {"trending": trending}
 
 @api_router.post("/crypto/portfolio-value")
-async def calculate_portfolio_value(holdings: List[dict], user_id: str = Depends(get_current_user)):
+async def calculate_portfolio_value(holdings: List[dict], currency: str = 'usd', user_id: str = Depends(get_current_user)):
     """Calculate portfolio value based on current prices"""
-    result = await crypto_price_service.calculate_portfolio_value(holdings)
-    return result
+    try:
+        return await crypto_price_service.calculate_portfolio_value(holdings, currency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class PortfolioBatchRequest(BaseModel):
+    portfolios: List[List[dict]]
+    currency: str = 'usd'
+
+@api_router.post("/crypto/portfolio-values")
+async def calculate_portfolio_values(request: PortfolioBatchRequest, user_id: str = Depends(get_current_user)):
+    """Value several portfolios in one call (one price lookup for all of them)"""
+    if len(request.portfolios) > 100:
+        raise HTTPException(status_code=400, detail="At most 100 portfolios per request")
+    try:
+        results = await crypto_price_service.calculate_portfolio_values(request.portfolios, request.currency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"portfolios": results}
 
 @api_router.get("/ticker")
 async def get_live_ticker(category: str = 'all'):
     """Get live ticker data based on news category"""
-    import random
-    
     try:
-        ticker_data = []
-        
-        # Get crypto prices for crypto/all categories
-        if category in ['crypto', 'all']:
-            crypto_symbols = ['bitcoin', 'ethereum', 'solana']
-            crypto_prices = await crypto_price_service.get_live_prices(crypto_symbols)
-            
-            if 'crypto' in crypto_prices and isinstance(crypto_prices['crypto'], list):
-                for coin in crypto_prices['crypto']:
-                    ticker_data.append({
-                        'symbol': coin['symbol'],
-                        'price': coin['price'],
-                        'change': coin.get('change_24h', 0),
-                        'type': 'crypto'
-                    })
-        
-        # Cannabis stocks (for cannabis category or all)
-        if category in ['cannabis', 'all']:
-            cannabis_stocks = [
-                {'symbol': 'TLRY', 'name': 'Tilray Brands', 'price': 1.64, 'change': round(random.uniform(-5, 5), 2), 'type': 'cannabis'},
-                {'symbol': 'CGC', 'name': 'Canopy Growth', 'price': 1.00, 'change': round(random.uniform(-5, 5), 2), 'type': 'cannabis'},
-                {'symbol': 'SNDL', 'name': 'Sundial Growers', 'price': 1.89, 'change': round(random.uniform(-5, 5), 2), 'type': 'cannabis'},
-                {'symbol': 'ACB', 'name': 'Aurora Cannabis', 'price': 4.00, 'change': round(random.uniform(-5, 5), 2), 'type': 'cannabis'},
-                {'symbol': 'CRON', 'name': 'Cronos Group', 'price': 2.34, 'change': round(random.uniform(-5, 5), 2), 'type': 'cannabis'},
-                {'symbol': 'NUGL', 'name': 'NUGL Inc.', 'price': 0.0011, 'change': round(random.uniform(-10, 10), 2), 'type': 'cannabis'},
-            ]
-            ticker_data.extend(cannabis_stocks)
-        
-        # Psychedelic stocks (for psychedelics category)
-        if category == 'psychedelics':
-            psychedelic_stocks = [
-                {'symbol': 'CMPS', 'name': 'COMPASS Pathways', 'price': 7.82, 'change': round(random.uniform(-6, 6), 2), 'type': 'psychedelics'},
-                {'symbol': 'MNMD', 'name': 'Mind Medicine', 'price': 5.45, 'change': round(random.uniform(-7, 7), 2), 'type': 'psychedelics'},
-                {'symbol': 'ATAI', 'name': 'ATAI Life Sciences', 'price': 1.23, 'change': round(random.uniform(-8, 8), 2), 'type': 'psychedelics'},
-                {'symbol': 'CYBN', 'name': 'Cybin Inc', 'price': 0.89, 'change': round(random.uniform(-9, 9), 2), 'type': 'psychedelics'},
-                {'symbol': 'NUMI', 'name': 'Numinus Wellness', 'price': 0.34, 'change': round(random.uniform(-10, 10), 2), 'type': 'psychedelics'},
-                {'symbol': 'FTRP', 'name': 'Field Trip Health', 'price': 0.18, 'change': round(random.uniform(-12, 12), 2), 'type': 'psychedelics'},
-                {'symbol': 'TRIP', 'name': 'Red Light Holland', 'price': 0.06, 'change': round(random.uniform(-15, 15), 2), 'type': 'psychedelics'},
-            ]
-            ticker_data.extend(psychedelic_stocks)
-        
-        # AI stocks (for AI category)
-        if category == 'ai':
-            ai_stocks = [
-                {'symbol': 'NVDA', 'name': 'NVIDIA', 'price': 876.50, 'change': round(random.uniform(-3, 3), 2), 'type': 'ai'},
-                {'symbol': 'MSFT', 'name': 'Microsoft', 'price': 428.90, 'change': round(random.uniform(-2, 2), 2), 'type': 'ai'},
-                {'symbol': 'GOOGL', 'name': 'Alphabet', 'price': 168.20, 'change': round(random.uniform(-2, 2), 2), 'type': 'ai'},
-                {'symbol': 'ORCL', 'name': 'Oracle', 'price': 142.80, 'change': round(random.uniform(-2, 2), 2), 'type': 'ai'},
-                {'symbol': 'META', 'name': 'Meta Platforms', 'price': 523.40, 'change': round(random.uniform(-2, 2), 2), 'type': 'ai'},
-                {'symbol': 'AMD', 'name': 'AMD', 'price': 127.30, 'change': round(random.uniform(-3, 3), 2), 'type': 'ai'},
-                {'symbol': 'PLTR', 'name': 'Palantir', 'price': 68.90, 'change': round(random.uniform(-4, 4), 2), 'type': 'ai'},
-            ]
-            ticker_data.extend(ai_stocks)
-        
-        # Market indices (for market category)
-        if category == 'market':
-            indices = [
-                {'symbol': 'SPX', 'name': 'S&P 500', 'price': 6644.30, 'change': round(random.uniform(-1, 1), 2), 'type': 'index'},
-                {'symbol': 'DJI', 'name': 'Dow Jones', 'price': 46270.45, 'change': round(random.uniform(-1, 1), 2), 'type': 'index'},
-                {'symbol': 'IXIC', 'name': 'NASDAQ', 'price': 22694.60, 'change': round(random.uniform(-1.5, 1.5), 2), 'type': 'index'},
-                {'symbol': 'FTSE', 'name': 'FTSE 100', 'price': 8240.10, 'change': round(random.uniform(-0.8, 0.8), 2), 'type': 'index'},
-                {'symbol': 'GOLD', 'name': 'Gold', 'price': 4175.00, 'change': round(random.uniform(-1, 1), 2), 'type': 'commodity'},
-                {'symbol': 'OIL', 'name': 'Crude Oil', 'price': 72.80, 'change': round(random.uniform(-2, 2), 2), 'type': 'commodity'},
-            ]
-            ticker_data.extend(indices)
-        
-        # International - Hong Kong stocks (for international category)
-        if category == 'international':
-            hk_stocks = [
-                {'symbol': 'BABA', 'name': 'Alibaba', 'price': 108.50, 'change': round(random.uniform(-3, 3), 2), 'type': 'hk'},
-                {'symbol': '0700.HK', 'name': 'Tencent', 'price': 425.60, 'change': round(random.uniform(-2, 2), 2), 'type': 'hk'},
-                {'symbol': 'JD', 'name': 'JD.com', 'price': 38.70, 'change': round(random.uniform(-3, 3), 2), 'type': 'hk'},
-                {'symbol': 'BIDU', 'name': 'Baidu', 'price': 92.40, 'change': round(random.uniform(-2, 2), 2), 'type': 'hk'},
-                {'symbol': 'NIO', 'name': 'NIO Inc.', 'price': 5.20, 'change': round(random.uniform(-4, 4), 2), 'type': 'hk'},
-                {'symbol': 'BEKE', 'name': 'KE Holdings', 'price': 18.90, 'change': round(random.uniform(-3, 3), 2), 'type': 'hk'},
-                {'symbol': 'PDD', 'name': 'PDD Holdings', 'price': 115.80, 'change': round(random.uniform(-3, 3), 2), 'type': 'hk'},
-            ]
-            ticker_data.extend(hk_stocks)
-        
-        # Jamaica Stock Exchange (for jamaica category)
-        if category == 'jamaica':
-            jse_stocks = [
-                {'symbol': 'NCBFG', 'name': 'NCB Financial Group', 'price': 95.00, 'change': round(random.uniform(-2, 2), 2), 'type': 'jse'},
-                {'symbol': 'JMMB', 'name': 'JMMB Group', 'price': 26.50, 'change': round(random.uniform(-1.5, 1.5), 2), 'type': 'jse'},
-                {'symbol': 'SJ', 'name': 'Sagicor Group Jamaica', 'price': 62.00, 'change': round(random.uniform(-1, 1), 2), 'type': 'jse'},
-                {'symbol': 'LASM', 'name': 'Lasco Manufacturing', 'price': 4.85, 'change': round(random.uniform(-2, 2), 2), 'type': 'jse'},
-                {'symbol': 'WIG', 'name': 'Wigton Windfarm', 'price': 0.72, 'change': round(random.uniform(-3, 3), 2), 'type': 'jse'},
-                {'symbol': 'JETCON', 'name': 'Jetcon Corporation', 'price': 3.20, 'change': round(random.uniform(-2, 2), 2), 'type': 'jse'},
-                {'symbol': 'SVL', 'name': 'Supreme Ventures', 'price': 21.50, 'change': round(random.uniform(-1.5, 1.5), 2), 'type': 'jse'},
-                {'symbol': 'MAILPAC', 'name': 'Mailpac Group', 'price': 5.10, 'change': round(random.uniform(-2, 2), 2), 'type': 'jse'},
-            ]
-            ticker_data.extend(jse_stocks)
-        
-        return {'ticker': ticker_data}
+        # Pre-encoded by the poller's latest tick; only the very first request waits for one
+        await ticker_snapshots.ensure_ready()
+        body = ticker_hub.encoded(category, 'body') or EMPTY_TICKER_BODY
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching ticker data: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch ticker data")
 
+@api_router.get("/ticker/stream")
+async def stream_live_ticker(request: Request, category: str = 'all'):
+    """Server-sent events stream of ticker snapshots, one per poller tick"""
+    if category not in TICKER_CATEGORIES:
+        raise HTTPException(status_code=400, detail="Unknown ticker category")
+    return StreamingResponse(
+        stream_ticker_sse(ticker_hub, category, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.websocket("/ticker/ws")
+async def ticker_websocket(websocket: WebSocket):
+    """Ticker over WebSocket with per-category subscriptions and delta updates"""
+    await serve_ticker_websocket(ticker_hub, websocket)
+
 @api_router.get("/media/legacy/{category}")
 async def get_legacy_media_content(category: str):
     """Get legacy content from nugl.com for a specific category"""
@@ -1344,12 +1359,17 @@ Sitemap: https://nugl.com/sitemap.xml
 
 app.include_router(api_router)
 
+# Serve cached GET bodies with ETag/304; added before CORS so CORS wraps cached responses too
+from services.response_cache import ResponseCacheMiddleware
+app.add_middleware(ResponseCacheMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cache"],
 )
 
 # Configure logging
@@ -1368,10 +1388,26 @@ async def startup_event():
     global automation_service
     automation_service = AutomationService(db)
     automation_service.start()
+    
+    # Apply the declarative index registry (idempotent); time-series collections must exist first
+    from services.index_registry import ensure_indexes
+    await PriceHistoryStore.ensure_collection(db)
+    await ensure_indexes(db)
+    
+    # Listen for cache invalidations from other workers (no-op without CACHE_REDIS_URL)
+    await cache_service.start()
+    price_poller.start()
     logger.info("Application started with automation service")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     if automation_service:
         automation_service.stop()
+    
+    from services.data_aggregator import feed_parse_pool
+    feed_parse_pool.shutdown()
+    password_hasher.shutdown()
+    await price_poller.stop()
+    await crypto_price_service.cg.aclose()
+    await cache_service.close()
     client.close()
\ No newline at end of file
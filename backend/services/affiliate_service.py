@@ -70,7 +70,6 @@ class AffiliateTrackingService:
         try:
             click = AffiliateClick(**affiliate_data)
             doc = click.model_dump()
-            doc["clicked_at"] = doc["clicked_at"].isoformat()
             await self.db.affiliate_clicks.insert_one(doc)
             
             # Update partner stats
@@ -98,7 +97,6 @@ class AffiliateTrackingService:
             )
             
             doc = conversion.model_dump()
-            doc["converted_at"] = doc["converted_at"].isoformat()
             await self.db.affiliate_conversions.insert_one(doc)
             
             # Update click record
@@ -134,7 +132,7 @@ class AffiliateTrackingService:
     async def get_affiliate_stats(self, days: int = 30):
         """Get aggregate affiliate statistics"""
         try:
-            cutoff_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
             
             # Get clicks and conversions
             clicks = await self.db.affiliate_clicks.count_documents({
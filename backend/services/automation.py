@@ -1,8 +1,12 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timezone
 import os
 import logging
 from .data_aggregator import NewsAggregator, SentimentAnalyzer
+from .feed_cache import FeedCache
+from .news_ingest import NewsIngestWriter
+from .cache_service import cache_service
 
 logger = logging.getLogger(__name__)
 
@@ -17,24 +21,28 @@ class AutomationService:
         """Fetch and update news from RSS feeds"""
         try:
             logger.info("Starting news feed update...")
-            articles = await NewsAggregator.aggregate_all_feeds()
+            feed_cache = FeedCache(self.db)
+            await feed_cache.load()
+            articles = await NewsAggregator.aggregate_all_feeds(feed_cache)
             
-            # Add sentiment analysis to each article
-            for article in articles:
-                sentiment_data = SentimentAnalyzer.analyze(
-                    article['title'] + ' ' + article['content']
-                )
+            # Add sentiment analysis to the whole batch in one pass
+            sentiments = SentimentAnalyzer.analyze_many(
+                [article['title'] + ' ' + article['content'] for article in articles],
+                [article['category'] for article in articles]
+            )
+            for article, sentiment_data in zip(articles, sentiments):
                 article.update(sentiment_data)
             
-            # Insert new articles (avoid duplicates by checking title)
-            inserted_count = 0
-            for article in articles:
-                existing = await self.db.news_articles.find_one({'title': article['title']})
-                if not existing:
-                    await self.db.news_articles.insert_one(article)
-                    inserted_count += 1
+            # Insert new articles in one bulk upsert (duplicates are skipped by dedupe key)
+            result = await NewsIngestWriter(self.db).write(articles)
             
-            logger.info(f"News feed update complete. Inserted {inserted_count} new articles.")
+            # Only remember validators once the articles they cover are stored
+            await feed_cache.save()
+            
+            logger.info(
+                f"News feed update complete. Inserted {result['inserted']} new articles, "
+                f"skipped {result['skipped']} duplicates."
+            )
         except Exception as e:
             logger.error(f"Error updating news feed: {str(e)}")
     
@@ -50,7 +58,7 @@ class AutomationService:
             await self.db.crypto_prices.delete_many({})
             price_doc = {
                 'data': prices,
-                'updated_at': datetime.now(timezone.utc).isoformat()
+                'updated_at': datetime.now(timezone.utc)
             }
             await self.db.crypto_prices.insert_one(price_doc)
             
@@ -58,20 +66,6 @@ class AutomationService:
         except Exception as e:
             logger.error(f"Error updating crypto prices: {str(e)}")
     
-    async def cleanup_old_data(self):
-        """Clean up old data"""
-        try:
-            logger.info("Cleaning up old data...")
-            # Delete news older than 30 days
-            from datetime import datetime, timedelta, timezone
-            cutoff_date = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-            result = await self.db.news_articles.delete_many({
-                'published_at': {'$lt': cutoff_date}
-            })
-            logger.info(f"Deleted {result.deleted_count} old articles.")
-        except Exception as e:
-            logger.error(f"Error cleaning up old data: {str(e)}")
-    
     def start(self):
         """Start automated tasks"""
         # Update news every hour
@@ -90,12 +84,12 @@ class AutomationService:
             id='update_crypto'
         )
         
-        # Cleanup old data daily
+        # Sweep expired cache entries every minute
         self.scheduler.add_job(
-            self.cleanup_old_data,
+            cache_service.cleanup_expired,
             'interval',
-            days=1,
-            id='cleanup_data'
+            minutes=1,
+            id='cache_cleanup'
         )
         
         self.scheduler.start()
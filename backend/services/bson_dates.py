@@ -0,0 +1,71 @@
+from bson.codec_options import CodecOptions
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Decode BSON dates as timezone-aware UTC datetimes (pass to AsyncIOMotorClient)
+CODEC_OPTIONS = CodecOptions(tz_aware=True, tzinfo=timezone.utc)
+
+# Timestamp fields stored as native BSON dates, per collection
+DATE_FIELDS = {
+    'users': ['created_at'],
+    'wallet_users': ['created_at'],
+    'news_articles': ['published_at'],
+    'press_releases': ['published_at'],
+    'nfts': ['created_at'],
+    'nft_transactions': ['timestamp'],
+    'transactions': ['created_at'],
+    'chat_history': ['timestamp'],
+    'reviews': ['created_at'],
+    'comments': ['created_at'],
+    'follows': ['created_at'],
+    'notifications': ['created_at'],
+    'price_alerts': ['created_at'],
+    'crypto_prices': ['updated_at'],
+    'feed_cache': ['checked_at'],
+    'affiliate_clicks': ['clicked_at'],
+    'affiliate_conversions': ['converted_at', 'paid_at'],
+    'affiliate_partners': ['created_at'],
+    'subscriptions': ['current_period_start', 'current_period_end', 'created_at'],
+    'referral_codes': ['created_at', 'expires_at'],
+    'referrals': ['created_at', 'completed_at'],
+    'referral_rewards': ['created_at', 'paid_at'],
+    'sponsored_content': ['start_date', 'end_date', 'created_at'],
+    'featured_listings': ['start_date', 'end_date', 'created_at'],
+    'ad_impressions': ['timestamp'],
+    'ad_clicks': ['timestamp'],
+}
+
+def as_datetime(value, default=None):
+    """Coerce a stored timestamp (BSON date, naive datetime or legacy ISO string) to aware UTC"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return default
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return default
+
+async def count_string_dates(db, collection: str, fields: list) -> dict:
+    """Count documents still holding ISO strings in each date field"""
+    return {
+        field: await db[collection].count_documents({field: {'$type': 'string'}})
+        for field in fields
+    }
+
+async def migrate_collection(db, collection: str, fields: list) -> dict:
+    """Convert ISO string timestamps to BSON dates server-side, one update per field"""
+    migrated = {}
+    for field in fields:
+        # $dateFromString runs inside the server; unparseable values are left untouched
+        result = await db[collection].update_many(
+            {field: {'$type': 'string'}},
+            [{'$set': {field: {'$dateFromString': {'dateString': f'${field}', 'onError': f'${field}'}}}}]
+        )
+        migrated[field] = result.modified_count
+        if result.modified_count:
+            logger.info(f"Migrated {result.modified_count} {collection}.{field} values to BSON dates")
+    return migrated
@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+import os
+import pickle
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(ABC):
+    """Shared (L2) cache tier behind CacheService; values cross it as bytes"""
+    
+    @abstractmethod
+    async def get(self, key: str):
+        ...
+    
+    @abstractmethod
+    async def set(self, key: str, data: bytes, ttl_seconds: float):
+        ...
+    
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+    
+    @abstractmethod
+    async def delete_prefix(self, prefix: str):
+        ...
+    
+    @abstractmethod
+    async def publish_invalidation(self, key: str):
+        """Tell other workers to drop key from their L1 (a trailing '*' drops a prefix)"""
+    
+    @abstractmethod
+    async def listen_invalidations(self, callback):
+        """Call callback(key) for invalidations published by other workers until cancelled"""
+    
+    async def close(self):
+        pass
+    
+    # Serialization happens only at this tier; in-process entries stay live objects.
+    # pickle keeps datetimes, bytes and tuples intact; the shared store must be trusted.
+    @staticmethod
+    def dumps(value) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @staticmethod
+    def loads(data: bytes):
+        return pickle.loads(data)
+
+class RedisCacheBackend(CacheBackend):
+    """L2 tier over any redis.asyncio-compatible client (redis-py, fakeredis)"""
+    
+    CHANNEL = 'cache:invalidate'
+    
+    def __init__(self, client, prefix: str = 'nugl:'):
+        self.client = client
+        self.prefix = prefix
+        self.instance_id = uuid.uuid4().hex  # skip our own invalidation messages
+    
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis.asyncio as redis
+        return cls(redis.from_url(url), **kwargs)
+    
+    async def get(self, key: str):
+        return await self.client.get(self.prefix + key)
+    
+    async def set(self, key: str, data: bytes, ttl_seconds: float):
+        await self.client.set(self.prefix + key, data, px=max(1, int(ttl_seconds * 1000)))
+    
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+    
+    async def delete_prefix(self, prefix: str):
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + prefix + '*', count=500)]
+        if keys:
+            await self.client.delete(*keys)
+    
+    async def publish_invalidation(self, key: str):
+        await self.client.publish(self.prefix + self.CHANNEL, f"{self.instance_id}:{key}")
+    
+    async def listen_invalidations(self, callback):
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.prefix + self.CHANNEL)
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                data = message['data']
+                sender, _, key = (data.decode() if isinstance(data, bytes) else data).partition(':')
+                if sender != self.instance_id:
+                    callback(key)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+    
+    async def close(self):
+        await self.client.aclose()
+
+def backend_from_env():
+    """Build the L2 backend from CACHE_REDIS_URL; None keeps the cache purely in-memory"""
+    url = os.environ.get('CACHE_REDIS_URL')
+    if not url:
+        return None
+    try:
+        return RedisCacheBackend.from_url(url)
+    except ImportError:
+        logger.warning("CACHE_REDIS_URL is set but redis is not installed; using in-memory cache only")
+        return None
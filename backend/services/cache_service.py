@@ -1,22 +1,106 @@
-from functools import lru_cache
-from datetime import datetime, timedelta, timezone
-import json
+from collections import OrderedDict
+from functools import wraps
+import asyncio
+import heapq
+import os
+import random
+import sys
+import time
 import logging
+from .cache_backends import backend_from_env
 
 logger = logging.getLogger(__name__)
 
+def estimate_size(value, _depth: int = 0) -> int:
+    """Approximate memory footprint of a cached object without serializing it"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
+
 class CacheService:
-    """In-memory caching service (in production, use Redis)"""
+    """Bounded in-memory LRU cache with per-key TTL and a byte budget (in production, use Redis)
+    
+    Values are stored by reference, not serialized: callers get back the same object
+    they cached and must treat it as read-only.
+    
+    With a shared backend configured, the async methods (aget/aset/adelete) read through
+    to it and keep other workers' in-process copies coherent via invalidation messages.
+    The sync methods only touch this process.
+    """
+    
+    def __init__(self, max_entries: int = None, max_bytes: int = None, backend=None):
+        self.max_entries = max_entries or int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+        self.max_bytes = max_bytes or int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        
+        self._cache = OrderedDict()  # key -> (value, expires_at, size), least recently used first
+        self._expiry_heap = []  # (expires_at, key); stale entries are skipped lazily
+        self._bytes = 0
+        
+        self.backend = backend
+        self._listener = None
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+    
+    @staticmethod
+    def _sizeof(key: str, value) -> int:
+        return len(key) + estimate_size(value)
+    
+    def _remove(self, key: str):
+        _, _, size = self._cache.pop(key)
+        self._bytes -= size
+    
+    def _expire_due(self, now: float):
+        """Drop entries whose TTL has passed, in expiry order"""
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._cache.get(key)
+            # Only expire if the heap entry still matches the live value (key may have been reset)
+            if entry and entry[1] == expires_at:
+                self._remove(key)
+                self.expirations += 1
     
-    def __init__(self):
-        self._cache = {}
-        self._ttl = {}
+    def _evict_to_budget(self):
+        """Evict least recently used entries until both limits hold"""
+        while self._cache and (len(self._cache) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._cache))
+            self._remove(key)
+            self.evictions += 1
     
     def set(self, key: str, value: any, ttl_seconds: int = 300):
-        """Set cache value with TTL"""
+        """Set cache value with TTL (kept as a live reference, no copy)"""
         try:
-            self._cache[key] = json.dumps(value) if not isinstance(value, str) else value
-            self._ttl[key] = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+            stored = value
+            size = self._sizeof(key, stored)
+            if size > self.max_bytes:
+                logger.warning(f"Not caching {key}: {size} bytes exceeds cache budget")
+                return
+            
+            now = time.monotonic()
+            self._expire_due(now)
+            if key in self._cache:
+                self._remove(key)
+            
+            expires_at = now + ttl_seconds
+            self._cache[key] = (stored, expires_at, size)
+            self._bytes += size
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            
+            self._evict_to_budget()
             logger.debug(f"Cached {key} for {ttl_seconds} seconds")
         except Exception as e:
             logger.error(f"Cache set error: {str(e)}")
@@ -24,20 +108,22 @@ class CacheService:
     def get(self, key: str):
         """Get cache value if not expired"""
         try:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
                 return None
             
             # Check if expired
-            if datetime.now(timezone.utc) > self._ttl.get(key, datetime.now(timezone.utc)):
-                del self._cache[key]
-                del self._ttl[key]
+            value, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
                 return None
             
-            value = self._cache[key]
-            try:
-                return json.loads(value)
-            except:
-                return value
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return value
         except Exception as e:
             logger.error(f"Cache get error: {str(e)}")
             return None
@@ -45,22 +131,267 @@ class CacheService:
     def delete(self, key: str):
         """Delete cache entry"""
         if key in self._cache:
-            del self._cache[key]
-            del self._ttl[key]
+            self._remove(key)
+    
+    def delete_prefix(self, prefix: str):
+        """Delete every entry whose key starts with prefix"""
+        for key in [key for key in self._cache if key.startswith(prefix)]:
+            self._remove(key)
     
     def clear(self):
         """Clear all cache"""
         self._cache.clear()
-        self._ttl.clear()
+        self._expiry_heap.clear()
+        self._bytes = 0
     
-    def cleanup_expired(self):
-        """Remove expired entries"""
-        now = datetime.now(timezone.utc)
-        expired_keys = [k for k, exp_time in self._ttl.items() if now > exp_time]
-        for key in expired_keys:
+    async def aget(self, key: str):
+        """Get from this process, falling back to the shared backend"""
+        value = self.get(key)
+        if value is not None or self.backend is None:
+            return value
+        
+        try:
+            data = await self.backend.get(key)
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"Cache backend get error: {str(e)}")
+            return None
+        if data is None:
+            self.l2_misses += 1
+            return None
+        
+        self.l2_hits += 1
+        value, expires_at = self.backend.loads(data)
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            return None
+        self.set(key, value, remaining)
+        return value
+    
+    async def aset(self, key: str, value: any, ttl_seconds: int = 300):
+        """Set locally and in the shared backend, then invalidate other workers' copies"""
+        self.set(key, value, ttl_seconds)
+        if self.backend is None:
+            return
+        
+        try:
+            # Wall-clock expiry travels with the value so readers keep the original deadline
+            await self.backend.set(key, self.backend.dumps((value, time.time() + ttl_seconds)), ttl_seconds)
+            await self.backend.publish_invalidation(key)
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"Cache backend set error: {str(e)}")
+    
+    async def adelete(self, key: str):
+        """Delete locally, in the shared backend and in other workers"""
+        self.delete(key)
+        if self.backend is None:
+            return
+        
+        try:
+            await self.backend.delete(key)
+            await self.backend.publish_invalidation(key)
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"Cache backend delete error: {str(e)}")
+    
+    async def adelete_prefix(self, prefix: str):
+        """Delete every key under prefix locally, in the shared backend and in other workers"""
+        self.delete_prefix(prefix)
+        if self.backend is None:
+            return
+        
+        try:
+            await self.backend.delete_prefix(prefix)
+            await self.backend.publish_invalidation(prefix + '*')
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"Cache backend delete error: {str(e)}")
+    
+    def _on_invalidation(self, key: str):
+        # A trailing '*' invalidates a prefix; a bare '*' everything
+        if key.endswith('*'):
+            self.delete_prefix(key[:-1])
+        else:
             self.delete(key)
-        if expired_keys:
-            logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
+    
+    async def start(self):
+        """Subscribe to invalidations from other workers (no-op without a backend)"""
+        if self.backend is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+    
+    async def _listen(self):
+        while True:
+            try:
+                await self.backend.listen_invalidations(self._on_invalidation)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Missed messages may leave stale entries, so drop everything before resubscribing
+                logger.error(f"Cache invalidation listener error: {str(e)}")
+                self.clear()
+                await asyncio.sleep(5)
+    
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.backend is not None:
+            await self.backend.close()
+    
+    def cleanup_expired(self):
+        """Remove expired entries and compact the expiry heap"""
+        before = self.expirations
+        self._expire_due(time.monotonic())
+        
+        # Overwritten keys leave stale heap entries behind; rebuild once they dominate
+        if len(self._expiry_heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [(expires_at, key) for key, (_, expires_at, _) in self._cache.items()]
+            heapq.heapify(self._expiry_heap)
+        
+        expired = self.expirations - before
+        if expired:
+            logger.info(f"Cleaned up {expired} expired cache entries")
+    
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and current memory use"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'l2_hits': self.l2_hits,
+            'l2_misses': self.l2_misses,
+            'l2_errors': self.l2_errors
+        }
+
+# Global cache instance (shared tier from CACHE_REDIS_URL, if set)
+cache_service = CacheService(backend=backend_from_env())
+
+# In-process only, for results that describe this worker's own state
+local_cache = CacheService(max_entries=1000)
 
-# Global cache instance
-cache_service = CacheService()
\ No newline at end of file
+def cached(ttl: float, key=None, stale_ttl: float = 0, jitter: float = 0.1, cache: CacheService = None):
+    """Cache an async function's result in CacheService with single-flight refreshes
+    
+    ttl: seconds a result is fresh; each entry's lifetime is shortened by up to
+        `jitter` (a fraction of ttl) so keys cached together don't expire together
+    key: callable taking the function's arguments and returning the cache key;
+        defaults to the qualified name plus the repr of the arguments
+    stale_ttl: seconds past freshness during which the stale value is served while
+        one background call refreshes it
+    
+    Concurrent misses for the same key share one in-flight call. The wrapper gains
+    an async invalidate(), which drops every key it has cached in all workers, and
+    refresh(*args), which starts (or joins) a background call for those arguments while
+    the current value keeps being served, returning its future, and peek(*args), which
+    returns the stored value, fresh or stale, without calling the function (None if absent).
+    """
+    def decorator(func):
+        store = cache or cache_service
+        inflight = {}  # cache key -> asyncio.Future of the running call
+        prefix = f"cached:{func.__module__}.{func.__qualname__}:"
+        
+        def make_key(args, kwargs):
+            if key is not None:
+                return prefix + key(*args, **kwargs)
+            return prefix + f"{args!r}:{sorted(kwargs.items())!r}"
+        
+        def refresh(cache_key, args, kwargs):
+            future = inflight.get(cache_key)
+            if future is not None:
+                return future
+            
+            async def run():
+                try:
+                    result = await func(*args, **kwargs)
+                    fresh_for = ttl * (1 - random.random() * jitter)
+                    # Wall clock, since entries may be shared with other workers
+                    await store.aset(cache_key, (result, time.time() + fresh_for), fresh_for + stale_ttl)
+                    return result
+                finally:
+                    inflight.pop(cache_key, None)
+            
+            future = asyncio.ensure_future(run())
+            inflight[cache_key] = future
+            return future
+        
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = make_key(args, kwargs)
+            entry = await store.aget(cache_key)
+            if entry is not None:
+                value, fresh_until = entry
+                if time.time() >= fresh_until and cache_key not in inflight:
+                    # Serve stale now; failures are logged and the stale value stays until it expires
+                    refresh(cache_key, args, kwargs).add_done_callback(_log_refresh_failure)
+                return value
+            
+            # Shield so one cancelled waiter doesn't cancel the call the others are waiting on
+            return await asyncio.shield(refresh(cache_key, args, kwargs))
+        
+        async def invalidate():
+            await store.adelete_prefix(prefix)
+        
+        def start_refresh(*args, **kwargs):
+            return refresh(make_key(args, kwargs), args, kwargs)
+        
+        async def peek(*args, **kwargs):
+            entry = await store.aget(make_key(args, kwargs))
+            return entry[0] if entry is not None else None
+        
+        wrapper.invalidate = invalidate
+        wrapper.refresh = start_refresh
+        wrapper.peek = peek
+        return wrapper
+    
+    return decorator
+
+def _log_refresh_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Background cache refresh failed: {str(future.exception())}")
+
+class BatchLoader:
+    """Coalesce single-key loads issued in the same event-loop turn into one batch call
+    
+    batch_fn(keys) returns {key: value}; keys it leaves out resolve to None. Pair with
+    @cached so each key is loaded once and concurrent misses share one upstream call.
+    """
+    
+    def __init__(self, batch_fn):
+        self.batch_fn = batch_fn
+        self._pending = {}  # key -> future, for the batch not yet dispatched
+    
+    async def load(self, key):
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        if key not in self._pending:
+            self._pending[key] = loop.create_future()
+        return await asyncio.shield(self._pending[key])
+    
+    def _dispatch(self):
+        batch, self._pending = self._pending, {}
+        asyncio.ensure_future(self._run(batch))
+    
+    async def _run(self, batch: dict):
+        try:
+            results = await self.batch_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+                future.exception()  # retrieved here so unawaited failures aren't logged twice
+            return
+        for key, future in batch.items():
+            future.set_result(results.get(key))
@@ -0,0 +1,153 @@
+import httpx
+import asyncio
+import json
+import os
+import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        # The lock queues callers so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def fixture_transport(fixtures: dict) -> httpx.MockTransport:
+    """Offline transport serving canned JSON by request path (e.g. '/simple/price')
+    
+    A fixture value is either the JSON payload or a callable taking the httpx.Request and
+    returning the payload, or an httpx.Response to send as is. Unknown paths return 404.
+    """
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.split('/api/v3', 1)[-1]
+        if path not in fixtures:
+            return httpx.Response(404, json={'error': f'no fixture for {path}'})
+        payload = fixtures[path]
+        if callable(payload):
+            payload = payload(request)
+        if isinstance(payload, httpx.Response):
+            return payload
+        return httpx.Response(200, json=payload)
+    
+    return httpx.MockTransport(handler)
+
+class CoinGeckoClient:
+    """Async CoinGecko API client on one pooled keep-alive connection set
+    
+    Requests draw from a token bucket sized to the API quota (COINGECKO_RATE_LIMIT calls
+    per minute, free tier 30) and retry 429/5xx/network errors with exponential backoff,
+    honouring Retry-After. Set COINGECKO_FIXTURES to a JSON file of {path: payload} to
+    run offline.
+    
+    The bucket is per process: with N uvicorn workers the deployment may make up to
+    N x COINGECKO_RATE_LIMIT calls per minute, so set COINGECKO_RATE_LIMIT to the quota
+    divided by the worker count.
+    """
+    
+    BASE_URL = 'https://api.coingecko.com/api/v3'
+    MAX_RETRIES = 3
+    BACKOFF_BASE = 0.5  # seconds, doubled per attempt
+    BACKOFF_MAX = 30
+    
+    def __init__(self, api_key: str = None, rate_per_minute: float = None, transport=None):
+        self.api_key = api_key or os.environ.get('COINGECKO_API_KEY')
+        rate_per_minute = rate_per_minute or float(os.environ.get('COINGECKO_RATE_LIMIT', 30))
+        self.limiter = TokenBucket(rate_per_minute / 60, capacity=max(1, rate_per_minute / 6))
+        
+        if transport is None and os.environ.get('COINGECKO_FIXTURES'):
+            with open(os.environ['COINGECKO_FIXTURES']) as f:
+                transport = fixture_transport(json.load(f))
+        self.transport = transport
+        self._client = None
+    
+    def _http_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            headers = {'Accept': 'application/json'}
+            if self.api_key:
+                headers['x-cg-demo-api-key'] = self.api_key
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                headers=headers,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60),
+                transport=self.transport
+            )
+        return self._client
+    
+    def _backoff(self, attempt: int, response: httpx.Response = None) -> float:
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(float(response.headers['Retry-After']), self.BACKOFF_MAX)
+        delay = min(self.BACKOFF_BASE * (2 ** attempt), self.BACKOFF_MAX)
+        return delay * (0.5 + random.random() / 2)
+    
+    async def _get(self, path: str, params: dict = None):
+        client = self._http_client()
+        for attempt in range(self.MAX_RETRIES + 1):
+            await self.limiter.acquire()
+            try:
+                response = await client.get(path, params=params)
+            except httpx.TransportError as e:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"CoinGecko {path} failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.MAX_RETRIES:
+                    response.raise_for_status()
+                delay = self._backoff(attempt, response)
+                logger.warning(f"CoinGecko {path} returned {response.status_code}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            
+            response.raise_for_status()
+            return response.json()
+    
+    async def get_price(self, ids, vs_currencies='usd', **options):
+        """GET /simple/price; boolean options (include_24hr_change, ...) as in pycoingecko"""
+        params = {
+            'ids': ids if isinstance(ids, str) else ','.join(ids),
+            'vs_currencies': vs_currencies if isinstance(vs_currencies, str) else ','.join(vs_currencies),
+        }
+        params.update({key: str(value).lower() if isinstance(value, bool) else value for key, value in options.items()})
+        return await self._get('/simple/price', params)
+    
+    async def get_coin_market_chart_by_id(self, id: str, vs_currency: str = 'usd', days=30):
+        return await self._get(f'/coins/{id}/market_chart', {'vs_currency': vs_currency, 'days': days})
+    
+    async def get_search_trending(self):
+        return await self._get('/search/trending')
+    
+    async def get_coins_list(self):
+        return await self._get('/coins/list')
+    
+    async def get_exchange_rates(self):
+        return await self._get('/exchange_rates')
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Global client: every CryptoPriceService shares its connection pool and rate budget
+coingecko_client = CoinGeckoClient()
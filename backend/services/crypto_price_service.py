@@ -1,8 +1,11 @@
-from pycoingecko import CoinGeckoAPI
 import logging
 from typing import List, Dict, Optional
 import asyncio
 from datetime import datetime, timezone
+import time
+from .cache_service import cached, BatchLoader
+from .coingecko_client import coingecko_client
+from .portfolio_engine import PortfolioEngine, PortfolioBook
 
 logger = logging.getLogger(__name__)
 
@@ -32,194 +35,169 @@ class CryptoPriceService:
         'ACB': {'name': 'Aurora Cannabis', 'price': 4.56, 'change': 2.3}
     }
     
-    def __init__(self):
-        self.cg = CoinGeckoAPI()
-        self._cache = {}
-        self._cache_timestamp = None
-        self._cache_duration = 30  # Cache for 30 seconds
+    PRICE_TTL = 30  # seconds a coin's quote is fresh
+    PRICE_RETENTION = 300  # seconds a stale quote may still be served if upstream fails
+    
+    def __init__(self, client=None):
+        self.cg = client or coingecko_client
+        self._quote_loader = BatchLoader(self._fetch_quotes)
+        self.portfolio_book = PortfolioBook(self)  # fed by the price poller (see server.py)
     
     async def get_live_prices(self, coin_ids: Optional[List[str]] = None) -> Dict:
         """Get live crypto prices"""
-        try:
-            # Use cache if available and fresh
-            if self._is_cache_valid():
-                return self._cache
-            
-            # Get coins to fetch
-            if coin_ids is None:
-                coin_ids = list(self.SUPPORTED_COINS.keys())
-            
-            # Fetch prices from CoinGecko
-            loop = asyncio.get_event_loop()
-            prices_data = await loop.run_in_executor(
-                None,
-                lambda: self.cg.get_price(
-                    ids=','.join(coin_ids),
-                    vs_currencies='usd',
-                    include_24hr_change=True,
-                    include_24hr_vol=True,
-                    include_market_cap=True
-                )
-            )
-            
-            # Format response
-            result = {
-                'crypto': [],
-                'stocks': [],
-                'last_updated': datetime.now(timezone.utc).isoformat()
-            }
-            
-            # Process crypto prices
-            for coin_id, data in prices_data.items():
-                if coin_id in self.SUPPORTED_COINS:
-                    coin_info = self.SUPPORTED_COINS[coin_id]
-                    result['crypto'].append({
-                        'id': coin_id,
-                        'symbol': coin_info['symbol'],
-                        'name': coin_info['name'],
-                        'price': data.get('usd', 0),
-                        'change_24h': data.get('usd_24h_change', 0),
-                        'volume_24h': data.get('usd_24h_vol', 0),
-                        'market_cap': data.get('usd_market_cap', 0)
-                    })
-            
-            # Add cannabis stocks (simulated for now)
-            for symbol, data in self.CANNABIS_STOCKS.items():
-                result['stocks'].append({
-                    'symbol': symbol,
-                    'name': data['name'],
-                    'price': data['price'],
-                    'change': data['change']
+        # Get coins to fetch
+        if coin_ids is None:
+            coin_ids = list(self.SUPPORTED_COINS.keys())
+        coin_ids = list(dict.fromkeys(coin_ids))
+        
+        quotes = await self.get_quotes(coin_ids)
+        
+        # Format response
+        result = {
+            'crypto': [],
+            'stocks': [],
+            'last_updated': None
+        }
+        
+        # Process crypto prices
+        for coin_id in coin_ids:
+            if coin_id in self.SUPPORTED_COINS and coin_id in quotes:
+                coin_info = self.SUPPORTED_COINS[coin_id]
+                result['crypto'].append({
+                    'id': coin_id,
+                    'symbol': coin_info['symbol'],
+                    'name': coin_info['name'],
+                    **quotes[coin_id][0]
                 })
-            
-            # Update cache
-            self._cache = result
-            self._cache_timestamp = datetime.now(timezone.utc)
-            
-            logger.info(f"Fetched prices for {len(result['crypto'])} cryptocurrencies")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error fetching crypto prices: {str(e)}")
-            # Return cached data if available, otherwise return empty
-            return self._cache if self._cache else {'crypto': [], 'stocks': [], 'last_updated': None}
+        
+        if quotes:
+            # Report the oldest quote served, not the time of this request
+            oldest = min(fetched_at for _, fetched_at in quotes.values())
+            result['last_updated'] = datetime.fromtimestamp(oldest, tz=timezone.utc).isoformat()
+        
+        # Add cannabis stocks (simulated for now)
+        for symbol, data in self.CANNABIS_STOCKS.items():
+            result['stocks'].append({
+                'symbol': symbol,
+                'name': data['name'],
+                'price': data['price'],
+                'change': data['change']
+            })
+        
+        return result
+    
+    async def get_quotes(self, coin_ids: List[str]) -> Dict:
+        """Per-coin quotes as coin id -> (quote, fetched_at); only stale coins go upstream"""
+        results = await asyncio.gather(*(self._quote(coin_id) for coin_id in coin_ids), return_exceptions=True)
+        
+        quotes = {}
+        errors = []
+        for coin_id, result in zip(coin_ids, results):
+            if isinstance(result, Exception):
+                errors.append(result)
+            elif result is not None:
+                quotes[coin_id] = result
+        if errors:
+            logger.error(f"Error fetching crypto prices: {str(errors[0])}")
+        return quotes
+    
+    # Coins cached together expire together (no jitter), so their refreshes share a batch.
+    # Past PRICE_TTL a quote is served stale while it refreshes, for up to PRICE_RETENTION.
+    @cached(ttl=PRICE_TTL, stale_ttl=PRICE_RETENTION - PRICE_TTL, jitter=0, key=lambda self, coin_id: coin_id)
+    async def _quote(self, coin_id: str):
+        """(quote, fetched_at) for one coin, or None if upstream doesn't know it"""
+        return await self._quote_loader.load(coin_id)
+    
+    async def _fetch_quotes(self, coin_ids: List[str]) -> Dict:
+        """Fetch quotes for coin_ids in one simple/price call"""
+        prices_data = await self.cg.get_price(
+            ids=','.join(coin_ids),
+            vs_currencies='usd',
+            include_24hr_change=True,
+            include_24hr_vol=True,
+            include_market_cap=True
+        )
+        
+        fetched_at = time.time()
+        quotes = {}
+        for coin_id, data in prices_data.items():
+            quote = {
+                'price': data.get('usd', 0),
+                'change_24h': data.get('usd_24h_change', 0),
+                'volume_24h': data.get('usd_24h_vol', 0),
+                'market_cap': data.get('usd_market_cap', 0)
+            }
+            quotes[coin_id] = (quote, fetched_at)
+        
+        logger.info(f"Fetched prices for {len(quotes)} of {len(coin_ids)} stale cryptocurrencies")
+        return quotes
     
     async def get_coin_price(self, coin_id: str) -> Optional[Dict]:
         """Get price for a specific coin"""
-        try:
-            loop = asyncio.get_event_loop()
-            data = await loop.run_in_executor(
-                None,
-                lambda: self.cg.get_price(
-                    ids=coin_id,
-                    vs_currencies='usd',
-                    include_24hr_change=True
-                )
-            )
-            
-            if coin_id in data:
-                coin_info = self.SUPPORTED_COINS.get(coin_id, {'symbol': coin_id.upper(), 'name': coin_id})
-                return {
-                    'id': coin_id,
-                    'symbol': coin_info['symbol'],
-                    'name': coin_info['name'],
-                    'price': data[coin_id].get('usd', 0),
-                    'change_24h': data[coin_id].get('usd_24h_change', 0)
-                }
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching price for {coin_id}: {str(e)}")
+        quotes = await self.get_quotes([coin_id])
+        if coin_id not in quotes:
             return None
+        
+        coin_info = self.SUPPORTED_COINS.get(coin_id, {'symbol': coin_id.upper(), 'name': coin_id})
+        quote = quotes[coin_id][0]
+        return {
+            'id': coin_id,
+            'symbol': coin_info['symbol'],
+            'name': coin_info['name'],
+            'price': quote['price'],
+            'change_24h': quote['change_24h']
+        }
     
-    async def get_historical_prices(self, coin_id: str, days: int = 30) -> List[Dict]:
-        """Get historical price data"""
+    @cached(ttl=86400, stale_ttl=86400, key=lambda self: "crypto:coin_ids")
+    async def _coin_ids(self) -> frozenset:
+        return frozenset(coin['id'] for coin in await self.cg.get_coins_list())
+    
+    async def is_known_coin(self, coin_id: str) -> bool:
+        """Whether coin_id is a supported coin or listed by CoinGecko"""
+        if coin_id in self.SUPPORTED_COINS:
+            return True
         try:
-            loop = asyncio.get_event_loop()
-            data = await loop.run_in_executor(
-                None,
-                lambda: self.cg.get_coin_market_chart_by_id(
-                    id=coin_id,
-                    vs_currency='usd',
-                    days=days
-                )
-            )
-            
-            # Format data for charts
-            prices = []
-            for timestamp, price in data['prices']:
-                prices.append({
-                    'timestamp': timestamp,
-                    'date': datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).isoformat(),
-                    'price': price
-                })
-            
-            return prices
+            return coin_id in await self._coin_ids()
         except Exception as e:
-            logger.error(f"Error fetching historical prices for {coin_id}: {str(e)}")
-            return []
+            logger.error(f"Error loading CoinGecko coin list: {str(e)}")
+            return False
     
     async def get_trending_coins(self) -> List[Dict]:
         """Get trending cryptocurrencies"""
         try:
-            loop = asyncio.get_event_loop()
-            data = await loop.run_in_executor(None, self.cg.get_search_trending)
-            
-            trending = []
-            for item in data.get('coins', [])[:10]:
-                coin = item['item']
-                trending.append({
-                    'id': coin['id'],
-                    'symbol': coin['symbol'],
-                    'name': coin['name'],
-                    'market_cap_rank': coin.get('market_cap_rank', 0),
-                    'thumb': coin.get('thumb', '')
-                })
-            
-            return trending
+            return await self._fetch_trending_coins()
         except Exception as e:
             logger.error(f"Error fetching trending coins: {str(e)}")
             return []
     
-    def _is_cache_valid(self) -> bool:
-        """Check if cache is still valid"""
-        if not self._cache or not self._cache_timestamp:
-            return False
+    @cached(ttl=300, stale_ttl=900, key=lambda self: "crypto:trending")
+    async def _fetch_trending_coins(self) -> List[Dict]:
+        """Fetch trending coins from CoinGecko; raises on upstream errors"""
+        data = await self.cg.get_search_trending()
+        
+        trending = []
+        for item in data.get('coins', [])[:10]:
+            coin = item['item']
+            trending.append({
+                'id': coin['id'],
+                'symbol': coin['symbol'],
+                'name': coin['name'],
+                'market_cap_rank': coin.get('market_cap_rank', 0),
+                'thumb': coin.get('thumb', '')
+            })
         
-        age = (datetime.now(timezone.utc) - self._cache_timestamp).total_seconds()
-        return age < self._cache_duration
+        return trending
     
-    async def calculate_portfolio_value(self, holdings: List[Dict]) -> Dict:
+    async def calculate_portfolio_value(self, holdings: List[Dict], currency: str = 'usd') -> Dict:
         """Calculate total portfolio value"""
+        return (await self.calculate_portfolio_values([holdings], currency))[0]
+    
+    async def calculate_portfolio_values(self, portfolios: List[List[Dict]], currency: str = 'usd') -> List[Dict]:
+        """Value many portfolios with one symbol resolution pass and one batched price lookup"""
         try:
-            # Get current prices
-            prices = await self.get_live_prices()
-            price_map = {item['symbol']: item['price'] for item in prices['crypto']}
-            
-            total_value = 0
-            holdings_value = []
-            
-            for holding in holdings:
-                symbol = holding.get('symbol')
-                amount = holding.get('amount', 0)
-                
-                if symbol in price_map:
-                    current_price = price_map[symbol]
-                    value = amount * current_price
-                    total_value += value
-                    
-                    holdings_value.append({
-                        'symbol': symbol,
-                        'amount': amount,
-                        'price': current_price,
-                        'value': value,
-                        'invested': holding.get('invested', 0)
-                    })
-            
-            return {
-                'total_value': total_value,
-                'holdings': holdings_value,
-                'last_updated': datetime.now(timezone.utc).isoformat()
-            }
+            return await PortfolioEngine(self, self.cg, self.portfolio_book).value_many(portfolios, currency)
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error calculating portfolio value: {str(e)}")
-            return {'total_value': 0, 'holdings': [], 'last_updated': None}
\ No newline at end of file
+            return [{'total_value': 0, 'holdings': [], 'last_updated': None} for _ in portfolios]
@@ -1,8 +1,19 @@
 import feedparser
+import httpx
 import asyncio
-from datetime import datetime, timezone
+import os
+import multiprocessing
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
 import uuid
 import logging
+from .feed_cache import FeedCache
+from .news_ingest import article_dedupe_key
 
 logger = logging.getLogger(__name__)
 
@@ -43,66 +54,230 @@ class NewsAggregator:
         ]
     }
     
-    @staticmethod
-    async def fetch_rss_feed(url, category):
-        """Fetch and parse RSS feed"""
+    # Fan-out limits for concurrent feed fetching
+    MAX_CONCURRENT_FEEDS = 8
+    MAX_FEEDS_PER_HOST = 2
+    FEED_TIMEOUT = 15  # seconds
+    
+    # Per-host timeout overrides for hosts known to be slow
+    HOST_TIMEOUTS = {
+        'www.jamaicatoday.org': 8,
+    }
+    
+    USER_AGENT = 'NUGL-NewsAggregator/1.0 (+https://nugl.com)'
+    
+    # Entries older than this are dropped at ingest (matches the published_at_ttl index)
+    MAX_ARTICLE_AGE_DAYS = 30
+    
+    @classmethod
+    def _http_client(cls):
+        """Create the HTTP client shared by one round of feed fetches"""
+        return httpx.AsyncClient(
+            timeout=cls.FEED_TIMEOUT,
+            follow_redirects=True,
+            headers={'User-Agent': cls.USER_AGENT},
+            limits=httpx.Limits(max_connections=cls.MAX_CONCURRENT_FEEDS)
+        )
+    
+    @classmethod
+    async def fetch_rss_feed(cls, url, category, client=None, feed_cache=None):
+        """Fetch and parse RSS feed, skipping feeds unchanged since the last fetch
+        
+        Returns (articles, validators). Validators are only returned once the body has
+        been parsed, so a failed parse is retried on the next poll.
+        """
         try:
-            loop = asyncio.get_event_loop()
-            feed = await loop.run_in_executor(None, feedparser.parse, url)
+            headers = feed_cache.conditional_headers(url) if feed_cache else {}
+            if client is None:
+                async with cls._http_client() as own_client:
+                    response = await own_client.get(url, headers=headers)
+            else:
+                response = await client.get(url, headers=headers)
+            
+            # Not modified: skip parsing and sentiment entirely
+            if response.status_code == 304:
+                logger.debug(f"RSS feed {url} not modified")
+                return [], None
+            response.raise_for_status()
             
-            articles = []
-            for entry in feed.entries[:10]:  # Limit to 10 most recent
-                article = {
-                    'id': str(uuid.uuid4()),
-                    'title': entry.get('title', ''),
-                    'content': entry.get('summary', entry.get('description', ''))[:500],
-                    'category': category,
-                    'source_url': entry.get('link', ''),
-                    'published_at': datetime.now(timezone.utc).isoformat(),
-                    'trending_score': 0.5,
-                    'image_url': None
-                }
-                
-                # Try to extract image
-                if 'media_content' in entry:
-                    article['image_url'] = entry.media_content[0].get('url')
-                elif 'media_thumbnail' in entry:
-                    article['image_url'] = entry.media_thumbnail[0].get('url')
-                
-                articles.append(article)
+            # Servers without validators still often return byte-identical bodies
+            body = response.content
+            body_hash = FeedCache.content_hash(body)
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': body_hash
+            }
+            if feed_cache and feed_cache.is_unchanged(url, body_hash):
+                logger.debug(f"RSS feed {url} unchanged since last fetch")
+                return [], validators
             
-            return articles
+            # XML parsing is CPU-bound, so it runs in the dedicated parse pool
+            return await feed_parse_pool.parse(body, category), validators
         except Exception as e:
             logger.error(f"Error fetching RSS feed {url}: {str(e)}")
-            return []
+            return [], None
+    
+    @staticmethod
+    def _entry_published_at(entry, now):
+        """Publish time from the feed entry, falling back to ingest time"""
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        if not parsed:
+            return now
+        
+        # feedparser normalizes parsed dates to UTC struct_time
+        published_at = datetime(*parsed[:6], tzinfo=timezone.utc)
+        return min(published_at, now)  # Guard against feeds stamping future dates
     
     @classmethod
-    async def aggregate_all_feeds(cls):
-        """Aggregate news from all RSS feeds"""
-        all_articles = []
+    def _entry_to_article(cls, entry, category, now):
+        """Convert a feed entry to an article dict with a stable id"""
+        published_at = cls._entry_published_at(entry, now)
+        if published_at < now - timedelta(days=cls.MAX_ARTICLE_AGE_DAYS):
+            return None
         
-        for category, feeds in cls.RSS_FEEDS.items():
-            for feed_url in feeds:
-                articles = await cls.fetch_rss_feed(feed_url, category)
-                all_articles.extend(articles)
+        article = {
+            'title': entry.get('title', ''),
+            'content': entry.get('summary', entry.get('description', ''))[:500],
+            'category': category,
+            'source_url': entry.get('link', ''),
+            'guid': entry.get('id'),
+            'published_at': published_at,
+            'trending_score': 0.5,
+            'image_url': None
+        }
         
-        return all_articles
+        # Same story on every fetch -> same id, derived from the dedupe key
+        article['id'] = str(uuid.uuid5(uuid.NAMESPACE_URL, article_dedupe_key(article)))
+        
+        # Try to extract image
+        if 'media_content' in entry:
+            article['image_url'] = entry.media_content[0].get('url')
+        elif 'media_thumbnail' in entry:
+            article['image_url'] = entry.media_thumbnail[0].get('url')
+        
+        return article
     
     @classmethod
-    async def aggregate_category(cls, category):
-        """Aggregate news from a specific category"""
-        articles = []
+    async def _fetch_bounded(cls, url, category, semaphore, host_semaphores, client, feed_cache):
+        """Fetch a single feed within the global and per-host limits"""
+        host = urlparse(url).netloc
+        timeout = cls.HOST_TIMEOUTS.get(host, cls.FEED_TIMEOUT)
         
-        if category in cls.RSS_FEEDS:
-            for feed_url in cls.RSS_FEEDS[category]:
-                category_articles = await cls.fetch_rss_feed(feed_url, category)
-                articles.extend(category_articles)
+        async with semaphore, host_semaphores[host]:
+            try:
+                return await asyncio.wait_for(cls.fetch_rss_feed(url, category, client, feed_cache), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out fetching RSS feed {url} after {timeout}s")
+                return [], None
+    
+    @classmethod
+    async def fetch_feeds(cls, feeds, feed_cache=None):
+        """Fetch (url, category) pairs concurrently and return partial results
+        
+        Validators of successfully parsed feeds are recorded in feed_cache; callers persist
+        them with feed_cache.save() only after the returned articles are stored.
+        """
+        semaphore = asyncio.Semaphore(cls.MAX_CONCURRENT_FEEDS)
+        host_semaphores = defaultdict(lambda: asyncio.Semaphore(cls.MAX_FEEDS_PER_HOST))
+        
+        async with cls._http_client() as client:
+            results = await asyncio.gather(
+                *(
+                    cls._fetch_bounded(url, category, semaphore, host_semaphores, client, feed_cache)
+                    for url, category in feeds
+                ),
+                return_exceptions=True
+            )
+        
+        # Failed or timed out feeds contribute nothing; the rest are kept in feed order
+        all_articles = []
+        for (url, _), result in zip(feeds, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error fetching RSS feed {url}: {str(result)}")
+                continue
+            articles, validators = result
+            all_articles.extend(articles)
+            if feed_cache and validators:
+                feed_cache.update(url, **validators)
         
-        return articles
+        return all_articles
+    
+    @classmethod
+    async def aggregate_all_feeds(cls, feed_cache=None):
+        """Aggregate news from all RSS feeds"""
+        feeds = [
+            (feed_url, category)
+            for category, feed_urls in cls.RSS_FEEDS.items()
+            for feed_url in feed_urls
+        ]
+        return await cls.fetch_feeds(feeds, feed_cache)
+    
+    @classmethod
+    async def aggregate_category(cls, category, feed_cache=None):
+        """Aggregate news from a specific category"""
+        feeds = [(feed_url, category) for feed_url in cls.RSS_FEEDS.get(category, [])]
+        return await cls.fetch_feeds(feeds, feed_cache)
+
+
+def parse_feed_entries(body, category, max_entries=10):
+    """Parse raw feed bytes into article dicts (runs inside the parse pool)"""
+    feed = feedparser.parse(body)
+    now = datetime.now(timezone.utc)
+    
+    articles = []
+    for entry in feed.entries[:max_entries]:  # Limit to the most recent entries
+        article = NewsAggregator._entry_to_article(entry, category, now)
+        if article:
+            articles.append(article)
+    
+    return articles
+
+
+class FeedParsePool:
+    """Dedicated executor for feed parsing, kept apart from the default thread pool"""
+    
+    def __init__(self):
+        self.mode = os.environ.get('FEED_PARSE_POOL', 'process')  # process, thread
+        self.workers = int(os.environ.get('FEED_PARSE_WORKERS', 2))
+        self._executor = None
+    
+    def _get_executor(self):
+        if self._executor is None:
+            if self.mode == 'thread':
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='feed-parse')
+            else:
+                # Never fork this worker: its threads (Motor, schedulers, hash pool) may hold
+                # locks that a forked child would inherit locked
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('forkserver')
+                )
+            logger.info(f"Started feed parse pool ({self.mode}, {self.workers} workers)")
+        return self._executor
+    
+    async def parse(self, body, category):
+        """Parse feed bytes in the pool and return compact article dicts"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), parse_feed_entries, body, category)
+        except BrokenProcessPool:
+            # A crashed worker poisons the whole pool; replace it for the next feed
+            self.shutdown()
+            raise
+    
+    def shutdown(self):
+        """Stop the pool's workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Global parse pool instance
+feed_parse_pool = FeedParsePool()
 
 
 class SentimentAnalyzer:
-    """Simple sentiment analysis for news articles"""
+    """Keyword sentiment analysis for news articles using one compiled matcher per lexicon"""
     
     BULLISH_KEYWORDS = [
         'surge', 'rally', 'gain', 'growth', 'positive', 'bullish', 'up', 'increase',
@@ -114,14 +289,78 @@ class SentimentAnalyzer:
         'ban', 'reject', 'fail', 'crisis', 'concern', 'warning'
     ]
     
+    # Extra keywords layered on top of the base lexicon for specific news categories
+    CATEGORY_KEYWORDS = {
+        'cannabis': {
+            'bullish': ['decriminalize', 'reschedule', 'descheduling', 'expand'],
+            'bearish': ['raid', 'recall', 'prohibition', 'crackdown'],
+        },
+        'crypto': {
+            'bullish': ['adoption', 'all-time high', 'inflow', 'halving'],
+            'bearish': ['hack', 'exploit', 'liquidation', 'outflow', 'lawsuit'],
+        },
+        'ai': {
+            'bullish': ['launch', 'funding', 'partnership'],
+            'bearish': ['layoff', 'lawsuit', 'outage'],
+        },
+    }
+    
+    # Compiled matchers keyed by category (None = base lexicon)
+    _matchers = {}
+    
+    @staticmethod
+    def _variants(keyword):
+        """Inflected forms of a keyword ('approve' -> approves, approved, approving, ...)"""
+        forms = {keyword, keyword + 's', keyword + 'es', keyword + 'ed', keyword + 'ing'}
+        if keyword.endswith('e'):
+            forms.update({keyword + 'd', keyword[:-1] + 'ing'})
+        if keyword.endswith('y'):
+            forms.update({keyword[:-1] + 'ies', keyword[:-1] + 'ied'})
+        if keyword.endswith('p') and len(keyword) <= 4:
+            forms.update({keyword + 'ped', keyword + 'ping'})
+        return forms
+    
     @classmethod
-    def analyze(cls, text):
-        """Analyze sentiment of text"""
-        text_lower = text.lower()
+    def _trie_pattern(cls, words):
+        """Build a prefix-trie regex so matching cost does not grow with the keyword count"""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
         
-        bullish_count = sum(1 for word in cls.BULLISH_KEYWORDS if word in text_lower)
-        bearish_count = sum(1 for word in cls.BEARISH_KEYWORDS if word in text_lower)
+        def to_pattern(node):
+            end = '' in node
+            branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            return '(?:' + body + ')?' if end else body
         
+        return to_pattern(trie)
+    
+    @classmethod
+    def _matcher(cls, category=None):
+        """Return (compiled regex, form -> (keyword, polarity)) for a category's lexicon"""
+        if category not in cls._matchers:
+            lexicon = {'bullish': list(cls.BULLISH_KEYWORDS), 'bearish': list(cls.BEARISH_KEYWORDS)}
+            for polarity, keywords in cls.CATEGORY_KEYWORDS.get(category, {}).items():
+                lexicon[polarity].extend(keywords)
+            
+            forms = {}
+            for polarity, keywords in lexicon.items():
+                for keyword in keywords:
+                    for form in cls._variants(keyword):
+                        forms.setdefault(form, (keyword, polarity))
+            
+            cls._matchers[category] = (re.compile(rf'\b{cls._trie_pattern(forms)}\b'), forms)
+        
+        return cls._matchers[category]
+    
+    @staticmethod
+    def _score(bullish_count, bearish_count):
+        """Turn keyword counts into sentiment, score and impact"""
         if bullish_count > bearish_count:
             sentiment = 'bullish'
             score = min(50 + (bullish_count * 10), 100)
@@ -146,6 +385,46 @@ class SentimentAnalyzer:
             'sentiment_score': score,
             'impact': impact
         }
+    
+    @classmethod
+    def analyze(cls, text, category=None):
+        """Analyze sentiment of text"""
+        return cls.analyze_many([text], [category])[0]
+    
+    @classmethod
+    def analyze_many(cls, texts, categories=None):
+        """Analyze a batch of texts, scanning each category's texts in a single regex pass"""
+        if categories is None:
+            categories = [None] * len(texts)
+        
+        groups = defaultdict(list)
+        for index, category in enumerate(categories):
+            groups[category].append(index)
+        
+        results = [None] * len(texts)
+        for category, indexes in groups.items():
+            pattern, forms = cls._matcher(category)
+            
+            # Newline-joined batch; offsets map each match back to its text. Offsets come
+            # from the lowered strings since lower() can change length (e.g. 'İ')
+            lowered = [texts[index].lower() for index in indexes]
+            starts = []
+            offset = 0
+            for text in lowered:
+                starts.append(offset)
+                offset += len(text) + 1
+            batch = '\n'.join(lowered)
+            
+            # Each distinct keyword counts once per text
+            found = [set() for _ in indexes]
+            for match in pattern.finditer(batch):
+                found[bisect_right(starts, match.start()) - 1].add(forms[match.group()])
+            
+            for position, index in enumerate(indexes):
+                bullish_count = sum(1 for _, polarity in found[position] if polarity == 'bullish')
+                results[index] = cls._score(bullish_count, len(found[position]) - bullish_count)
+        
+        return results
 
 
 class CryptoDataProvider:
@@ -0,0 +1,75 @@
+from pymongo import UpdateOne
+from datetime import datetime, timezone
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+HEADER_VALIDATORS = ('etag', 'last_modified')
+
+class FeedCache:
+    """Per-feed HTTP validators (ETag, Last-Modified, body hash) stored in Mongo"""
+    
+    def __init__(self, db):
+        self.db = db
+        self._validators = {}
+        self._dirty = set()
+    
+    async def load(self):
+        """Load validators for every known feed in one query"""
+        try:
+            docs = await self.db.feed_cache.find({}, {'_id': 0}).to_list(1000)
+            self._validators = {doc['url']: doc for doc in docs}
+        except Exception as e:
+            logger.error(f"Error loading feed cache: {str(e)}")
+            self._validators = {}
+    
+    def conditional_headers(self, url: str) -> dict:
+        """Build If-None-Match / If-Modified-Since headers for a feed"""
+        validators = self._validators.get(url, {})
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+    
+    @staticmethod
+    def content_hash(body: bytes) -> str:
+        """Hash a feed body so unchanged responses can be detected without validators"""
+        return hashlib.sha256(body).hexdigest()
+    
+    def is_unchanged(self, url: str, body_hash: str) -> bool:
+        """Check whether a feed body matches the last one we parsed"""
+        return self._validators.get(url, {}).get('content_hash') == body_hash
+    
+    def update(self, url: str, etag=None, last_modified=None, content_hash=None):
+        """Record the validators of a 200 response; ones it omitted are dropped, not kept stale"""
+        validators = self._validators.setdefault(url, {'url': url})
+        for name, value in (('etag', etag), ('last_modified', last_modified)):
+            if value:
+                validators[name] = value
+            else:
+                validators.pop(name, None)
+        if content_hash:
+            validators['content_hash'] = content_hash
+        validators['checked_at'] = datetime.now(timezone.utc)
+        self._dirty.add(url)
+    
+    async def save(self):
+        """Persist validators changed since load() in a single bulk write"""
+        if not self._dirty:
+            return
+        
+        operations = []
+        for url in self._dirty:
+            update = {'$set': self._validators[url]}
+            dropped = {name: '' for name in HEADER_VALIDATORS if name not in self._validators[url]}
+            if dropped:
+                update['$unset'] = dropped
+            operations.append(UpdateOne({'url': url}, update, upsert=True))
+        try:
+            await self.db.feed_cache.bulk_write(operations, ordered=False)
+            self._dirty.clear()
+        except Exception as e:
+            logger.error(f"Error saving feed cache: {str(e)}")
@@ -0,0 +1,129 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+import logging
+
+logger = logging.getLogger(__name__)
+
+NEWS_RETENTION_SECONDS = 30 * 24 * 3600  # NewsAggregator.MAX_ARTICLE_AGE_DAYS
+
+# Only index string values, so legacy docs missing the field don't collide on null
+def _unique_when_set(field: str, name: str) -> IndexModel:
+    return IndexModel(
+        [(field, ASCENDING)],
+        name=name,
+        unique=True,
+        partialFilterExpression={field: {'$type': 'string'}}
+    )
+
+# Declarative index registry: collection -> indexes the hot queries rely on
+INDEXES = {
+    'news_articles': [
+        IndexModel([('category', ASCENDING), ('published_at', DESCENDING), ('id', DESCENDING)], name='category_published_id'),
+        IndexModel([('published_at', DESCENDING), ('id', DESCENDING)], name='published_id'),
+        IndexModel([('trending_score', DESCENDING)], name='trending_score'),
+        _unique_when_set('id', 'id_unique'),
+        IndexModel(
+            [('dedupe_key', ASCENDING)],
+            name='dedupe_key_unique',
+            unique=True,
+            partialFilterExpression={'dedupe_key': {'$exists': True}}
+        ),
+        # TTL expiry replaces the daily cleanup job (BSON dates only)
+        IndexModel([('published_at', ASCENDING)], name='published_at_ttl', expireAfterSeconds=NEWS_RETENTION_SECONDS),
+    ],
+    'strains': [
+        _unique_when_set('id', 'id_unique'),
+        IndexModel([('name', ASCENDING)], name='name'),
+        IndexModel([('type', ASCENDING)], name='type'),
+    ],
+    'users': [
+        _unique_when_set('id', 'id_unique'),
+        _unique_when_set('username', 'username_unique'),
+        _unique_when_set('email', 'email_unique'),
+        _unique_when_set('wallet_address', 'wallet_address_unique'),
+    ],
+    'wallet_users': [
+        _unique_when_set('wallet_address', 'wallet_address_unique'),
+    ],
+    'referral_codes': [
+        _unique_when_set('code', 'code_unique'),
+        IndexModel([('user_id', ASCENDING)], name='user_id'),
+    ],
+    'comments': [
+        IndexModel([('item_id', ASCENDING)], name='item_id'),
+        _unique_when_set('id', 'id_unique'),
+    ],
+    'reviews': [
+        IndexModel([('item_id', ASCENDING)], name='item_id'),
+    ],
+    'follows': [
+        IndexModel([('follower_id', ASCENDING), ('following_id', ASCENDING)], name='follower_following'),
+        IndexModel([('following_id', ASCENDING)], name='following_id'),
+    ],
+    'notifications': [
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING)], name='user_created'),
+    ],
+    'price_alerts': [
+        IndexModel([('user_id', ASCENDING), ('active', ASCENDING)], name='user_active'),
+        IndexModel([('id', ASCENDING)], name='id'),
+        IndexModel([('active', ASCENDING), ('asset_type', ASCENDING)], name='active_asset_type'),
+    ],
+    'transactions': [
+        IndexModel([('user_id', ASCENDING)], name='user_id'),
+    ],
+    'nfts': [
+        _unique_when_set('id', 'id_unique'),
+    ],
+    'affiliate_clicks': [
+        IndexModel([('clicked_at', DESCENDING)], name='clicked_at'),
+        IndexModel([('id', ASCENDING)], name='id'),
+    ],
+    'affiliate_conversions': [
+        IndexModel([('converted_at', DESCENDING)], name='converted_at'),
+    ],
+    'price_history': [
+        IndexModel([('coin_id', ASCENDING), ('ts', ASCENDING)], name='coin_ts'),
+    ],
+    'feed_cache': [
+        _unique_when_set('url', 'url_unique'),
+    ],
+}
+
+async def ensure_indexes(db, registry: dict = INDEXES) -> dict:
+    """Create every registered index; existing identical indexes are a no-op"""
+    report = {'created': [], 'failed': []}
+    for collection, models in registry.items():
+        for model in models:
+            name = model.document['name']
+            try:
+                # One index per call so a single conflict doesn't block the rest
+                await db[collection].create_indexes([model])
+                report['created'].append(f"{collection}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Could not create index {collection}.{name}: {str(e)}")
+                report['failed'].append(f"{collection}.{name}")
+    
+    logger.info(f"Index bootstrap: {len(report['created'])} ok, {len(report['failed'])} failed")
+    return report
+
+async def index_report(db, registry: dict = INDEXES) -> dict:
+    """Compare live indexes with the registry and include $indexStats usage counters"""
+    report = {}
+    for collection, models in registry.items():
+        expected = {model.document['name'] for model in models}
+        existing = await db[collection].index_information()
+        
+        usage = {}
+        async for stat in db[collection].aggregate([{'$indexStats': {}}]):
+            usage[stat['name']] = {'ops': stat['accesses']['ops'], 'since': stat['accesses']['since']}
+        
+        report[collection] = {
+            'missing': sorted(expected - set(existing)),
+            'unregistered': sorted(set(existing) - expected - {'_id_'}),
+            'unused': sorted(
+                name for name, stats in usage.items()
+                if stats['ops'] == 0 and name != '_id_'
+            ),
+            'usage': usage,
+        }
+    return report
@@ -0,0 +1,85 @@
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import hashlib
+import logging
+from .story_clustering import story_cluster_index
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only carry tracking information
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'cmpid', 'ocid'}
+
+def normalize_source_url(url: str) -> str:
+    """Normalize an article URL so the same story always maps to the same key"""
+    if not url:
+        return ''
+    
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    host = host.removesuffix(':80').removesuffix(':443')
+    
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    
+    # Scheme is dropped so http:// and https:// links collapse together
+    return urlunsplit(('', host, path, urlencode(query), '')).lstrip('/')
+
+def article_dedupe_key(article: dict) -> str:
+    """Stable dedupe key: normalized source URL, then feed GUID, then title"""
+    url_key = normalize_source_url(article.get('source_url', ''))
+    if url_key:
+        return url_key
+    if article.get('guid'):
+        return f"guid:{article['guid']}"
+    title = ' '.join(article.get('title', '').lower().split())
+    return f"title:{hashlib.sha1(title.encode()).hexdigest()}"
+
+class NewsIngestWriter:
+    """Writes a batch of aggregated articles with one unordered bulk upsert (relies on dedupe_key_unique)"""
+    
+    def __init__(self, db, cluster_index=story_cluster_index):
+        self.db = db
+        self.cluster_index = cluster_index
+    
+    async def write(self, articles: list) -> dict:
+        """Upsert articles, inserting only keys not already stored"""
+        # Dedupe within the batch first; the upsert filter stores dedupe_key on insert
+        batch = {}
+        for article in articles:
+            key = article_dedupe_key(article)
+            if key not in batch:
+                batch[key] = article
+        
+        if not batch:
+            return {'inserted': 0, 'skipped': len(articles)}
+        
+        # Group near-duplicate syndicated stories; already indexed ids were stored on an earlier run
+        if self.cluster_index is not None:
+            await self.cluster_index.ensure_loaded(self.db)
+            self.cluster_index.prune()
+            for article in batch.values():
+                if article.get('id') and article['id'] not in self.cluster_index:
+                    self.cluster_index.assign(article)
+        
+        operations = [
+            UpdateOne({'dedupe_key': key}, {'$setOnInsert': doc}, upsert=True)
+            for key, doc in batch.items()
+        ]
+        
+        try:
+            result = await self.db.news_articles.bulk_write(operations, ordered=False)
+            inserted = result.upserted_count
+        except BulkWriteError as e:
+            # Duplicate key races with a concurrent refresh are expected; anything inserted still counts
+            inserted = e.details.get('nUpserted', 0)
+            other_errors = [err for err in e.details.get('writeErrors', []) if err.get('code') != 11000]
+            if other_errors:
+                logger.error(f"News ingest bulk write errors: {other_errors[:3]}")
+        
+        return {'inserted': inserted, 'skipped': len(articles) - inserted}
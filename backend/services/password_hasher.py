@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import time
+import bcrypt
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hash queue is full; callers should answer 503"""
+
+class PasswordHasher:
+    """Bcrypt on a dedicated, bounded thread pool so logins never block the event loop
+    
+    bcrypt releases the GIL while hashing, so threads run in parallel. At most
+    `workers` hashes run at once and `max_queue` more may wait; beyond that requests are
+    rejected immediately instead of piling up. Hashes made with a cost other than
+    BCRYPT_ROUNDS are flagged for rehash on the next successful login.
+    """
+    
+    def __init__(self, workers: int = None, max_queue: int = None, rounds: int = None):
+        self.workers = workers or int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+        self.max_queue = max_queue if max_queue is not None else int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 32))
+        self.rounds = rounds or int(os.environ.get('BCRYPT_ROUNDS', 12))
+        self._executor = None
+        self._pending = 0  # queued + running
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+    
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            logger.info(f"Started password hash pool ({self.workers} workers, queue {self.max_queue})")
+        return self._executor
+    
+    async def _run(self, fn, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        
+        submitted = time.perf_counter()
+        timings = {}
+        
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings['wait'] = started - submitted
+                timings['run'] = time.perf_counter() - started
+        
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), timed)
+        finally:
+            self._pending -= 1
+            if timings:
+                self.completed += 1
+                self._wait_total += timings['wait']
+                self._run_total += timings['run']
+    
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=self.rounds))
+        return hashed.decode()
+    
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(bcrypt.checkpw, password.encode(), password_hash.encode())
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        # Modular crypt format: $2b$<cost>$<salt+hash>
+        parts = password_hash.split('$')
+        return len(parts) < 4 or parts[1] != '2b' or parts[2] != f'{self.rounds:02d}'
+    
+    async def verify_and_update(self, password: str, password_hash: str):
+        """Return (valid, new_hash); new_hash is set when a valid hash used outdated parameters"""
+        if not await self.verify(password, password_hash):
+            return False, None
+        if not self.needs_rehash(password_hash):
+            return True, None
+        try:
+            new_hash = await self.hash(password)
+        except PasswordHasherBusy:
+            return True, None  # upgrade on a quieter login
+        self.rehashed += 1
+        return True, new_hash
+    
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'rounds': self.rounds,
+            'running': min(self._pending, self.workers),
+            'queued': max(0, self._pending - self.workers),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'rehashed': self.rehashed,
+            'avg_wait_ms': round(self._wait_total / self.completed * 1000, 2) if self.completed else 0.0,
+            'avg_run_ms': round(self._run_total / self.completed * 1000, 2) if self.completed else 0.0
+        }
+    
+    def shutdown(self):
+        """Stop the pool's workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Global hasher: one pool per worker process
+password_hasher = PasswordHasher()
@@ -0,0 +1,279 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+import json
+import math
+import os
+import time
+import numpy as np
+import logging
+from .cache_service import cached
+from .coingecko_client import coingecko_client
+
+logger = logging.getLogger(__name__)
+
+def _group_sum(groups: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+    return np.bincount(groups, weights=values, minlength=count)
+
+def _validate_holding(holding, portfolio: int):
+    """Raise ValueError unless amount and invested are finite numbers (numeric strings allowed)"""
+    if not isinstance(holding, dict):
+        raise ValueError(f"Portfolio {portfolio}: holdings must be objects")
+    for field in ('amount', 'invested'):
+        value = holding.get(field, 0)
+        try:
+            if isinstance(value, bool) or not math.isfinite(float(value)):
+                raise ValueError
+        except (TypeError, ValueError):
+            label = holding.get('symbol') or holding.get('coin_id') or '?'
+            raise ValueError(f"Portfolio {portfolio}: invalid {field} {value!r} for {label}") from None
+
+class PortfolioEngine:
+    """Values many portfolios at once from one batched price lookup
+    
+    Holdings are {symbol or coin_id, amount, invested}. Symbols resolve through the
+    supported-coin table, then CoinGecko's coin list; anything that cannot be resolved
+    or priced is reported under 'unresolved' instead of being dropped silently. With a
+    PortfolioBook, portfolios whose coins haven't moved since their last valuation are
+    served from it.
+    """
+    
+    def __init__(self, price_service, client=None, book=None):
+        self.price_service = price_service
+        self.client = client or coingecko_client
+        self.book = book
+        self._supported_symbols = {
+            info['symbol']: coin_id for coin_id, info in price_service.SUPPORTED_COINS.items()
+        }
+    
+    @cached(ttl=86400, stale_ttl=86400, key=lambda self: "crypto:coins:by_symbol")
+    async def _coins_by_symbol(self) -> dict:
+        coins = await self.client.get_coins_list()
+        by_symbol = {}
+        for coin in coins:
+            by_symbol.setdefault(coin['symbol'].upper(), []).append(coin['id'])
+        return by_symbol
+    
+    @cached(ttl=600, stale_ttl=3600, key=lambda self: "crypto:exchange_rates")
+    async def _exchange_rates(self) -> dict:
+        data = await self.client.get_exchange_rates()
+        return {code: rate['value'] for code, rate in data['rates'].items()}
+    
+    async def _fx_rate(self, currency: str) -> float:
+        """Multiplier from USD to currency"""
+        currency = currency.lower()
+        if currency == 'usd':
+            return 1.0
+        rates = await self._exchange_rates()
+        if currency not in rates:
+            raise ValueError(f"Unsupported currency: {currency}")
+        return rates[currency] / rates['usd']
+    
+    async def resolve(self, holdings: list) -> list:
+        """Coin id per holding, or None when the symbol is unknown or ambiguous"""
+        resolved = []
+        by_symbol = None
+        for holding in holdings:
+            if holding.get('coin_id'):
+                resolved.append(holding['coin_id'])
+                continue
+            symbol = str(holding.get('symbol', '')).upper()
+            if symbol in self._supported_symbols:
+                resolved.append(self._supported_symbols[symbol])
+                continue
+            
+            if by_symbol is None:
+                try:
+                    by_symbol = await self._coins_by_symbol()
+                except Exception as e:
+                    logger.error(f"Error loading CoinGecko coin list: {str(e)}")
+                    by_symbol = {}
+            candidates = by_symbol.get(symbol, [])
+            if len(candidates) == 1:
+                resolved.append(candidates[0])
+            elif symbol.lower() in candidates:
+                resolved.append(symbol.lower())
+            else:
+                resolved.append(None)
+        return resolved
+    
+    async def value_many(self, portfolios: list, currency: str = 'usd') -> list:
+        """Value every portfolio with one symbol resolution pass and one price lookup
+        
+        Raises ValueError for an unsupported currency or a non-numeric amount/invested, so
+        one bad holding fails the request instead of zeroing the whole batch.
+        """
+        for index, holdings in enumerate(portfolios):
+            for holding in holdings:
+                _validate_holding(holding, index)
+        if self.book is None:
+            return (await self._value(portfolios, currency))[0]
+        
+        # Portfolios none of whose coins moved since they were last valued come from the book
+        keys = [self.book.key(holdings, currency) for holdings in portfolios]
+        results = [self.book.get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            valued, quotes = await self._value([portfolios[index] for index in missing], currency)
+            for index, result in zip(missing, valued):
+                results[index] = result
+                if not result['unresolved']:
+                    self.book.put(keys[index], result, quotes)
+        return results
+    
+    async def _value(self, portfolios: list, currency: str) -> tuple:
+        """(results, quotes used) for portfolios, all priced with one lookup"""
+        fx = await self._fx_rate(currency)
+        flat = [(index, holding) for index, holdings in enumerate(portfolios) for holding in holdings]
+        coin_ids = await self.resolve([holding for _, holding in flat])
+        
+        unique_ids = sorted({coin_id for coin_id in coin_ids if coin_id})
+        quotes = await self.price_service.get_quotes(unique_ids) if unique_ids else {}
+        
+        results = [
+            {
+                'total_value': 0.0, 'total_invested': 0.0, 'total_pnl': 0.0, 'change_24h': 0.0,
+                'currency': currency.lower(), 'holdings': [], 'unresolved': [], 'last_updated': None
+            }
+            for _ in portfolios
+        ]
+        
+        rows = []
+        for (index, holding), coin_id in zip(flat, coin_ids):
+            if coin_id is None or coin_id not in quotes:
+                results[index]['unresolved'].append(holding.get('symbol') or holding.get('coin_id'))
+            else:
+                rows.append((index, holding, coin_id))
+        if not rows:
+            return results, quotes
+        
+        count = len(portfolios)
+        owner = np.fromiter((index for index, _, _ in rows), dtype=np.int64, count=len(rows))
+        amount = np.fromiter((float(holding.get('amount', 0)) for _, holding, _ in rows), dtype=np.float64, count=len(rows))
+        invested = np.fromiter((float(holding.get('invested', 0)) for _, holding, _ in rows), dtype=np.float64, count=len(rows)) * fx
+        price = np.fromiter((quotes[coin_id][0]['price'] or 0 for _, _, coin_id in rows), dtype=np.float64, count=len(rows)) * fx
+        change = np.fromiter((quotes[coin_id][0]['change_24h'] or 0 for _, _, coin_id in rows), dtype=np.float64, count=len(rows))
+        
+        value = amount * price
+        pnl = value - invested
+        # A -100% move leaves no base to recover; such holdings count as unchanged
+        growth = 1 + change / 100
+        value_24h_ago = np.divide(value, growth, out=value.copy(), where=growth > 0)
+        
+        total_value = _group_sum(owner, value, count)
+        total_invested = _group_sum(owner, invested, count)
+        total_24h_ago = _group_sum(owner, value_24h_ago, count)
+        weight = np.divide(value, total_value[owner], out=np.zeros_like(value), where=total_value[owner] > 0)
+        total_change = np.divide(
+            (total_value - total_24h_ago) * 100, total_24h_ago,
+            out=np.zeros_like(total_value), where=total_24h_ago > 0
+        )
+        
+        columns = zip(value.tolist(), pnl.tolist(), weight.tolist(), price.tolist(), invested.tolist(), change.tolist())
+        for (index, holding, coin_id), (v, p, w, px, inv, ch) in zip(rows, columns):
+            results[index]['holdings'].append({
+                'symbol': holding.get('symbol') or self.price_service.SUPPORTED_COINS.get(coin_id, {}).get('symbol', coin_id.upper()),
+                'coin_id': coin_id,
+                'amount': holding.get('amount', 0),
+                'price': px,
+                'value': v,
+                'invested': inv,
+                'pnl': p,
+                'weight': w,
+                'change_24h': ch
+            })
+        
+        oldest = {}
+        for index, _, coin_id in rows:
+            fetched_at = quotes[coin_id][1]
+            oldest[index] = min(oldest.get(index, fetched_at), fetched_at)
+        
+        for index, result in enumerate(results):
+            result['total_value'] = float(total_value[index])
+            result['total_invested'] = float(total_invested[index])
+            result['total_pnl'] = float(total_value[index] - total_invested[index])
+            result['change_24h'] = float(total_change[index])
+            if index in oldest:
+                result['last_updated'] = datetime.fromtimestamp(oldest[index], tz=timezone.utc).isoformat()
+        return results, quotes
+
+class PortfolioBook:
+    """Valuations of recently requested portfolios, recomputed only when a relevant price moves
+    
+    Entries are keyed by the raw holdings and currency. The price poller calls on_tick,
+    which compares each tracked coin's fresh quote with the price its portfolios were
+    valued at and drops only the portfolios holding a coin that moved by more than
+    `threshold` (relative); those are revalued on their next request, the rest are served
+    from memory. Entries also expire after `max_age` so a stalled poller can't pin them.
+    Cached results are shared and must be treated as read-only.
+    """
+    
+    def __init__(self, price_service, threshold: float = None, max_age: float = None, max_portfolios: int = None):
+        self.price_service = price_service
+        self.threshold = threshold if threshold is not None else float(os.environ.get('PORTFOLIO_REVALUE_THRESHOLD', 0.0005))
+        self.max_age = max_age or float(os.environ.get('PORTFOLIO_BOOK_MAX_AGE', 300))
+        self.max_portfolios = max_portfolios or int(os.environ.get('PORTFOLIO_BOOK_SIZE', 1000))
+        self._entries = OrderedDict()  # key -> (result, valued_at, coin ids)
+        self._holders = {}  # coin id -> keys of entries holding it
+        self._prices = {}  # coin id -> USD price its entries were valued at
+    
+    @staticmethod
+    def key(holdings: list, currency: str) -> str:
+        return json.dumps([currency.lower(), holdings], sort_keys=True, default=str)
+    
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, valued_at, _ = entry
+        if time.monotonic() - valued_at >= self.max_age:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return result
+    
+    def put(self, key: str, result: dict, quotes: dict):
+        """Store a valuation made from quotes (coin id -> (quote, fetched_at))"""
+        coin_ids = {holding['coin_id'] for holding in result['holdings']}
+        prices = {coin_id: quotes[coin_id][0]['price'] for coin_id in coin_ids}
+        # Entries valued at an older price of these coins are now known to be stale
+        self.update_prices(prices)
+        
+        self._drop(key)
+        self._entries[key] = (result, time.monotonic(), coin_ids)
+        for coin_id in coin_ids:
+            self._holders.setdefault(coin_id, set()).add(key)
+            self._prices[coin_id] = prices[coin_id]
+        while len(self._entries) > self.max_portfolios:
+            self._drop(next(iter(self._entries)))
+    
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for coin_id in entry[2]:
+            holders = self._holders.get(coin_id)
+            holders.discard(key)
+            if not holders:
+                del self._holders[coin_id]
+                del self._prices[coin_id]
+    
+    def update_prices(self, prices: dict) -> int:
+        """Apply coin id -> USD price; drop the portfolios holding a coin that moved, returning how many"""
+        stale = set()
+        for coin_id, price in prices.items():
+            old = self._prices.get(coin_id)
+            if old is None or price is None:
+                continue
+            if abs(price - old) > self.threshold * abs(old):
+                stale.update(self._holders[coin_id])
+        for key in stale:
+            self._drop(key)
+        return len(stale)
+    
+    async def on_tick(self):
+        """Poller listener: check the booked coins against the quotes the tick just refreshed"""
+        coin_ids = sorted(self._holders)
+        if not coin_ids:
+            return
+        quotes = await self.price_service.get_quotes(coin_ids)
+        self.update_prices({coin_id: quote['price'] for coin_id, (quote, _) in quotes.items() if quote.get('price') is not None})
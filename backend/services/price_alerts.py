@@ -0,0 +1,136 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+import asyncio
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AlertBook:
+    """Active alerts of one asset and condition, kept sorted by target price"""
+    
+    def __init__(self):
+        self.targets = []
+        self.ids = []
+    
+    def add(self, target: float, alert_id: str):
+        index = bisect_right(self.targets, target)
+        self.targets.insert(index, target)
+        self.ids.insert(index, alert_id)
+    
+    def pop_crossed(self, condition: str, price: float) -> list:
+        """Remove and return the ids crossed at price: targets <= price for 'above', >= for 'below'"""
+        if condition == 'above':
+            index = bisect_right(self.targets, price)
+            crossed = self.ids[:index]
+            del self.targets[:index], self.ids[:index]
+        else:
+            index = bisect_left(self.targets, price)
+            crossed = self.ids[index:]
+            del self.targets[index:], self.ids[index:]
+        return crossed
+
+class PriceAlertEngine:
+    """Evaluates active price alerts on every poller tick
+    
+    Active crypto alerts live in memory as one AlertBook per (asset, condition), so a tick
+    costs a bisect per book rather than a scan of every alert. Firing flips the alert to
+    inactive with a conditional update first; only the worker that wins that update writes
+    the notification and sends the email, so each alert fires exactly once.
+    """
+    
+    CONDITIONS = ('above', 'below')
+    RELOAD_SECONDS = 60  # pick up alerts created on other workers
+    
+    def __init__(self, db, price_service, email_service):
+        self.db = db
+        self.price_service = price_service
+        self.email_service = email_service
+        self._books = {}  # (asset_id, condition) -> AlertBook
+        self._alerts = {}  # alert id -> alert doc
+        self._loaded_at = None
+        self._deliveries = set()
+    
+    def add(self, alert: dict):
+        if alert.get('asset_type') != 'crypto' or alert.get('condition') not in self.CONDITIONS:
+            return
+        if not alert.get('active', True) or alert['id'] in self._alerts:
+            return
+        self._alerts[alert['id']] = alert
+        book = self._books.setdefault((alert['asset_id'], alert['condition']), AlertBook())
+        book.add(float(alert['target_price']), alert['id'])
+    
+    async def load(self):
+        """Rebuild the in-memory books from the active alerts in the database"""
+        docs = await self.db.price_alerts.find(
+            {'active': True, 'asset_type': 'crypto', 'condition': {'$in': list(self.CONDITIONS)}},
+            {'_id': 0}
+        ).to_list(None)
+        self._books = {}
+        self._alerts = {}
+        for doc in docs:
+            self.add(doc)
+        self._loaded_at = time.monotonic()
+    
+    def match(self, prices: dict) -> list:
+        """Remove and return (alert, price) for every alert crossed by prices (asset id -> price)"""
+        fired = []
+        for (asset_id, condition), book in self._books.items():
+            price = prices.get(asset_id)
+            if price is None:
+                continue
+            for alert_id in book.pop_crossed(condition, price):
+                fired.append((self._alerts.pop(alert_id), price))
+        return fired
+    
+    async def on_tick(self):
+        """Poller listener: evaluate alerts against the quotes the tick just refreshed"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.RELOAD_SECONDS:
+            await self.load()
+        
+        asset_ids = sorted({asset_id for asset_id, _ in self._books})
+        if not asset_ids:
+            return
+        quotes = await self.price_service.get_quotes(asset_ids)
+        prices = {coin_id: quote['price'] for coin_id, (quote, _) in quotes.items() if quote.get('price') is not None}
+        
+        fired = self.match(prices)
+        if fired:
+            await asyncio.gather(*(self._fire(alert, price) for alert, price in fired))
+    
+    async def _fire(self, alert: dict, price: float):
+        now = datetime.now(timezone.utc)
+        try:
+            claimed = await self.db.price_alerts.find_one_and_update(
+                {'id': alert['id'], 'active': True},
+                {'$set': {'active': False, 'triggered_at': now, 'triggered_price': price}}
+            )
+            if claimed is None:
+                return  # deleted, or already fired by another worker
+            
+            asset_name = self.price_service.SUPPORTED_COINS.get(alert['asset_id'], {}).get('name', alert['asset_id'])
+            await self.db.notifications.insert_one({
+                'id': str(uuid.uuid4()),
+                'user_id': alert['user_id'],
+                'type': 'price_alert',
+                'message': f"{asset_name} is {alert['condition']} ${alert['target_price']:,} (now ${price:,})",
+                'read': False,
+                'created_at': now
+            })
+        except Exception as e:
+            logger.error(f"Error firing price alert {alert['id']}: {str(e)}")
+            return
+        
+        # SMTP is slow; deliver outside the tick
+        task = asyncio.create_task(self._email(alert, asset_name, price))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+    
+    async def _email(self, alert: dict, asset_name: str, price: float):
+        try:
+            user = await self.db.users.find_one({'id': alert['user_id']}, {'_id': 0, 'email': 1})
+            if user and user.get('email'):
+                await self.email_service.send_price_alert(user['email'], asset_name, price, alert['target_price'])
+        except Exception as e:
+            logger.error(f"Error emailing price alert {alert['id']}: {str(e)}")
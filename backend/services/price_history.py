@@ -0,0 +1,218 @@
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import CollectionInvalid, OperationFailure
+import numpy as np
+import os
+import time
+import logging
+from .cache_service import CacheService, cached
+from .coingecko_client import coingecko_client
+
+logger = logging.getLogger(__name__)
+
+def lttb(ts: np.ndarray, values: np.ndarray, threshold: int):
+    """Largest-Triangle-Three-Buckets downsampling; keeps first/last points and visual extremes"""
+    n = len(ts)
+    if threshold >= n or threshold < 3:
+        return ts, values
+    
+    x = ts.astype(np.float64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average is the third vertex of the triangle
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = values[end:next_end].mean() if next_end > end else values[-1]
+        
+        areas = np.abs(
+            (x[previous] - avg_x) * (values[start:end] - values[previous])
+            - (x[previous] - x[start:end]) * (avg_y - values[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    
+    return ts[selected], values[selected]
+
+def min_max_reduce(ts: np.ndarray, values: np.ndarray, bucket_ms: int):
+    """Keep each time bucket's lowest and highest point, in time order"""
+    if len(ts) == 0:
+        return ts, values
+    buckets = ts // bucket_ms
+    order = np.lexsort((values, buckets))  # by bucket, then by value
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends]]))
+    return ts[keep], values[keep]
+
+# Loaded series, one entry per coin; the LRU bound keeps memory flat however many coins are charted
+series_cache = CacheService(
+    max_entries=int(os.environ.get('PRICE_HISTORY_MAX_COINS', 100)),
+    max_bytes=int(os.environ.get('PRICE_HISTORY_MAX_BYTES', 64 * 1024 * 1024))
+)
+
+class PriceHistoryStore:
+    """Local price time series per coin, backfilled once from CoinGecko and topped up incrementally
+    
+    Points persist in the `price_history` time-series collection. Recently charted coins
+    are also held in memory (series_cache) as columnar numpy arrays, with min-max reduced
+    copies at 5m, 1h and 1d resolution, so chart reads never call upstream once a coin is
+    loaded. Only coins CoinGecko knows are ever backfilled.
+    
+    A top-up extends the arrays already in memory: it reads only points newer than the
+    last one from Mongo (stored by other workers), then fetches what is still missing
+    from upstream. Stored points expire after MAX_DAYS (plus a day of slack).
+    """
+    
+    COLLECTION = 'price_history'
+    MAX_DAYS = 365
+    RESOLUTIONS = {'5m': 5 * 60 * 1000, '1h': 3600 * 1000, '1d': 86400 * 1000}
+    BACKFILL_DAYS = [365, 90, 1]  # CoinGecko returns daily, hourly and 5-minute points for these
+    TOP_UP_SECONDS = 300
+    DEFAULT_POINTS = 500
+    RETENTION_SECONDS = (MAX_DAYS + 1) * 86400
+    
+    def __init__(self, db, price_service, client=None):
+        self.db = db
+        self.price_service = price_service
+        self.client = client or coingecko_client
+    
+    @classmethod
+    async def ensure_collection(cls, db):
+        """Create the time-series collection with retention (a plain collection with a TTL index on servers without support)"""
+        try:
+            await db.create_collection(
+                cls.COLLECTION,
+                timeseries={'timeField': 'ts', 'metaField': 'coin_id', 'granularity': 'minutes'},
+                expireAfterSeconds=cls.RETENTION_SECONDS
+            )
+            return
+        except CollectionInvalid:
+            pass  # already exists, possibly created before retention was set
+        except OperationFailure as e:
+            logger.warning(f"Time-series collections unavailable, using a plain collection: {str(e)}")
+        
+        try:
+            await db.command({'collMod': cls.COLLECTION, 'expireAfterSeconds': cls.RETENTION_SECONDS})
+        except OperationFailure:
+            # Not a time-series collection: expire documents through a TTL index instead
+            try:
+                await db[cls.COLLECTION].create_index('ts', name='ts_ttl', expireAfterSeconds=cls.RETENTION_SECONDS)
+            except OperationFailure as e:
+                logger.error(f"Could not set price history retention: {str(e)}")
+    
+    @staticmethod
+    def _resolution_for(days: int) -> str:
+        if days <= 2:
+            return '5m'
+        if days <= 30:
+            return '1h'
+        return '1d'
+    
+    async def _load(self, coin_id: str, after_ms: int = None):
+        """Stored points in time order: the retention window, or only those after after_ms"""
+        if after_ms is None:
+            query = {'$gte': datetime.now(timezone.utc) - timedelta(days=self.MAX_DAYS)}
+        else:
+            query = {'$gt': datetime.fromtimestamp(after_ms / 1000, tz=timezone.utc)}
+        docs = await self.db[self.COLLECTION].find(
+            {'coin_id': coin_id, 'ts': query},
+            {'_id': 0, 'ts': 1, 'price': 1}
+        ).sort('ts', 1).to_list(None)
+        ts = np.fromiter((int(doc['ts'].timestamp() * 1000) for doc in docs), dtype=np.int64, count=len(docs))
+        price = np.fromiter((doc['price'] for doc in docs), dtype=np.float64, count=len(docs))
+        return ts, price
+    
+    async def _fetch(self, coin_id: str, days: int):
+        data = await self.client.get_coin_market_chart_by_id(id=coin_id, vs_currency='usd', days=days)
+        points = np.asarray(data.get('prices') or [], dtype=np.float64).reshape(-1, 2)
+        return points[:, 0].astype(np.int64), points[:, 1]
+    
+    # Fresh for TOP_UP_SECONDS, then served stale while one background call tops it up.
+    # A None result (upstream down, nothing stored) is remembered the same way.
+    @cached(ttl=TOP_UP_SECONDS, stale_ttl=MAX_DAYS * 86400, key=lambda self, coin_id: coin_id, cache=series_cache)
+    async def _series(self, coin_id: str):
+        """Stored points plus any missing tail from upstream, with reduced resolutions"""
+        previous = await self._series.peek(self, coin_id)
+        if previous is None:
+            ts, price = await self._load(coin_id)
+        else:
+            ts, price = previous['raw']
+            later_ts, later_price = await self._load(coin_id, after_ms=int(ts[-1]))
+            later = later_ts > ts[-1]  # millisecond rounding can return the last point again
+            ts = np.concatenate([ts, later_ts[later]])
+            price = np.concatenate([price, later_price[later]])
+        
+        now_ms = int(time.time() * 1000)
+        if len(ts) == 0:
+            fetch_days = self.BACKFILL_DAYS
+        elif now_ms - ts[-1] >= self.TOP_UP_SECONDS * 1000:
+            # Only the missing tail; gaps over a day come back hourly, which is fine for old data
+            gap_days = int((now_ms - ts[-1]) // self.RESOLUTIONS['1d']) + 1
+            fetch_days = [min(gap_days, 90)]
+        else:
+            fetch_days = []
+        
+        new_ts, new_price = [], []
+        for days in fetch_days:
+            try:
+                fetched_ts, fetched_price = await self._fetch(coin_id, days)
+            except Exception as e:
+                logger.error(f"Error fetching price history for {coin_id} ({days}d): {str(e)}")
+                continue
+            # Upstream adds a fresh "now" point on every call, so earlier points never match
+            # stored ones exactly; only the tail past the last stored point is new
+            fresh = fetched_ts > ts[-1] if len(ts) else np.ones(len(fetched_ts), dtype=bool)
+            new_ts.append(fetched_ts[fresh])
+            new_price.append(fetched_price[fresh])
+        
+        if new_ts:
+            added_ts = np.concatenate(new_ts)
+            added_price = np.concatenate(new_price)
+            added_ts, unique = np.unique(added_ts, return_index=True)
+            added_price = added_price[unique]
+            if len(added_ts):
+                await self.db[self.COLLECTION].insert_many([
+                    {'coin_id': coin_id, 'ts': datetime.fromtimestamp(t / 1000, tz=timezone.utc), 'price': float(p)}
+                    for t, p in zip(added_ts.tolist(), added_price.tolist())
+                ])
+                ts = np.concatenate([ts, added_ts])
+                price = np.concatenate([price, added_price])
+                order = np.argsort(ts, kind='stable')
+                ts, price = ts[order], price[order]
+        
+        # Trim to the retention window and build the reduced resolutions
+        keep = ts >= now_ms - self.MAX_DAYS * self.RESOLUTIONS['1d']
+        ts, price = ts[keep], price[keep]
+        if len(ts) == 0:
+            return None
+        levels = {name: min_max_reduce(ts, price, ms) for name, ms in self.RESOLUTIONS.items()}
+        levels['raw'] = (ts, price)
+        return levels
+    
+    async def get_prices(self, coin_id: str, days: int = 30, max_points: int = None):
+        """Chart points for the last `days` days, at most max_points of them; None for unknown coins"""
+        if not await self.price_service.is_known_coin(coin_id):
+            return None
+        days = max(1, min(int(days), self.MAX_DAYS))
+        
+        levels = await self._series(coin_id)
+        if levels is None:
+            return []
+        ts, price = levels[self._resolution_for(days)]
+        
+        cutoff = int(time.time() * 1000) - days * self.RESOLUTIONS['1d']
+        start = int(np.searchsorted(ts, cutoff))
+        ts, price = lttb(ts[start:], price[start:], max_points or self.DEFAULT_POINTS)
+        
+        return [
+            {
+                'timestamp': timestamp,
+                'date': datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).isoformat(),
+                'price': value
+            }
+            for timestamp, value in zip(ts.tolist(), price.tolist())
+        ]
@@ -0,0 +1,324 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+import asyncio
+import json
+import os
+import random
+import logging
+from .cache_service import cached, local_cache
+
+logger = logging.getLogger(__name__)
+
+# Quote types shown per news category, in display order
+TICKER_CATEGORY_TYPES = {
+    'all': ['crypto', 'cannabis'],
+    'crypto': ['crypto'],
+    'cannabis': ['cannabis'],
+    'psychedelics': ['psychedelics'],
+    'ai': ['ai'],
+    'market': ['index', 'commodity'],
+    'international': ['hk'],
+    'jamaica': ['jse'],
+}
+TICKER_CATEGORIES = list(TICKER_CATEGORY_TYPES)
+TICKER_CRYPTO_IDS = ['bitcoin', 'ethereum', 'solana']
+EMPTY_TICKER_BODY = b'{"ticker": []}'
+
+# Simulated listings until a stock feed is wired in: fixed price, daily change drawn within +/- volatility %
+SIMULATED_LISTINGS = [
+    {'symbol': 'TLRY', 'name': 'Tilray Brands', 'price': 1.64, 'volatility': 5, 'type': 'cannabis'},
+    {'symbol': 'CGC', 'name': 'Canopy Growth', 'price': 1.00, 'volatility': 5, 'type': 'cannabis'},
+    {'symbol': 'SNDL', 'name': 'Sundial Growers', 'price': 1.89, 'volatility': 5, 'type': 'cannabis'},
+    {'symbol': 'ACB', 'name': 'Aurora Cannabis', 'price': 4.00, 'volatility': 5, 'type': 'cannabis'},
+    {'symbol': 'CRON', 'name': 'Cronos Group', 'price': 2.34, 'volatility': 5, 'type': 'cannabis'},
+    {'symbol': 'NUGL', 'name': 'NUGL Inc.', 'price': 0.0011, 'volatility': 10, 'type': 'cannabis'},
+    {'symbol': 'CMPS', 'name': 'COMPASS Pathways', 'price': 7.82, 'volatility': 6, 'type': 'psychedelics'},
+    {'symbol': 'MNMD', 'name': 'Mind Medicine', 'price': 5.45, 'volatility': 7, 'type': 'psychedelics'},
+    {'symbol': 'ATAI', 'name': 'ATAI Life Sciences', 'price': 1.23, 'volatility': 8, 'type': 'psychedelics'},
+    {'symbol': 'CYBN', 'name': 'Cybin Inc', 'price': 0.89, 'volatility': 9, 'type': 'psychedelics'},
+    {'symbol': 'NUMI', 'name': 'Numinus Wellness', 'price': 0.34, 'volatility': 10, 'type': 'psychedelics'},
+    {'symbol': 'FTRP', 'name': 'Field Trip Health', 'price': 0.18, 'volatility': 12, 'type': 'psychedelics'},
+    {'symbol': 'TRIP', 'name': 'Red Light Holland', 'price': 0.06, 'volatility': 15, 'type': 'psychedelics'},
+    {'symbol': 'NVDA', 'name': 'NVIDIA', 'price': 876.50, 'volatility': 3, 'type': 'ai'},
+    {'symbol': 'MSFT', 'name': 'Microsoft', 'price': 428.90, 'volatility': 2, 'type': 'ai'},
+    {'symbol': 'GOOGL', 'name': 'Alphabet', 'price': 168.20, 'volatility': 2, 'type': 'ai'},
+    {'symbol': 'ORCL', 'name': 'Oracle', 'price': 142.80, 'volatility': 2, 'type': 'ai'},
+    {'symbol': 'META', 'name': 'Meta Platforms', 'price': 523.40, 'volatility': 2, 'type': 'ai'},
+    {'symbol': 'AMD', 'name': 'AMD', 'price': 127.30, 'volatility': 3, 'type': 'ai'},
+    {'symbol': 'PLTR', 'name': 'Palantir', 'price': 68.90, 'volatility': 4, 'type': 'ai'},
+    {'symbol': 'SPX', 'name': 'S&P 500', 'price': 6644.30, 'volatility': 1, 'type': 'index'},
+    {'symbol': 'DJI', 'name': 'Dow Jones', 'price': 46270.45, 'volatility': 1, 'type': 'index'},
+    {'symbol': 'IXIC', 'name': 'NASDAQ', 'price': 22694.60, 'volatility': 1.5, 'type': 'index'},
+    {'symbol': 'FTSE', 'name': 'FTSE 100', 'price': 8240.10, 'volatility': 0.8, 'type': 'index'},
+    {'symbol': 'GOLD', 'name': 'Gold', 'price': 4175.00, 'volatility': 1, 'type': 'commodity'},
+    {'symbol': 'OIL', 'name': 'Crude Oil', 'price': 72.80, 'volatility': 2, 'type': 'commodity'},
+    {'symbol': 'BABA', 'name': 'Alibaba', 'price': 108.50, 'volatility': 3, 'type': 'hk'},
+    {'symbol': '0700.HK', 'name': 'Tencent', 'price': 425.60, 'volatility': 2, 'type': 'hk'},
+    {'symbol': 'JD', 'name': 'JD.com', 'price': 38.70, 'volatility': 3, 'type': 'hk'},
+    {'symbol': 'BIDU', 'name': 'Baidu', 'price': 92.40, 'volatility': 2, 'type': 'hk'},
+    {'symbol': 'NIO', 'name': 'NIO Inc.', 'price': 5.20, 'volatility': 4, 'type': 'hk'},
+    {'symbol': 'BEKE', 'name': 'KE Holdings', 'price': 18.90, 'volatility': 3, 'type': 'hk'},
+    {'symbol': 'PDD', 'name': 'PDD Holdings', 'price': 115.80, 'volatility': 3, 'type': 'hk'},
+    {'symbol': 'NCBFG', 'name': 'NCB Financial Group', 'price': 95.00, 'volatility': 2, 'type': 'jse'},
+    {'symbol': 'JMMB', 'name': 'JMMB Group', 'price': 26.50, 'volatility': 1.5, 'type': 'jse'},
+    {'symbol': 'SJ', 'name': 'Sagicor Group Jamaica', 'price': 62.00, 'volatility': 1, 'type': 'jse'},
+    {'symbol': 'LASM', 'name': 'Lasco Manufacturing', 'price': 4.85, 'volatility': 2, 'type': 'jse'},
+    {'symbol': 'WIG', 'name': 'Wigton Windfarm', 'price': 0.72, 'volatility': 3, 'type': 'jse'},
+    {'symbol': 'JETCON', 'name': 'Jetcon Corporation', 'price': 3.20, 'volatility': 2, 'type': 'jse'},
+    {'symbol': 'SVL', 'name': 'Supreme Ventures', 'price': 21.50, 'volatility': 1.5, 'type': 'jse'},
+    {'symbol': 'MAILPAC', 'name': 'Mailpac Group', 'price': 5.10, 'volatility': 2, 'type': 'jse'},
+]
+
+class QuoteSource(ABC):
+    """Supplies ticker items ({symbol, price, change, type, ...}) once per tick"""
+    
+    @abstractmethod
+    async def fetch(self) -> list:
+        """Current items of this source"""
+
+class CryptoQuoteSource(QuoteSource):
+    """Crypto quotes from CryptoPriceService"""
+    
+    def __init__(self, price_service, coin_ids: list = None):
+        self.price_service = price_service
+        self.coin_ids = coin_ids or TICKER_CRYPTO_IDS
+    
+    async def fetch(self) -> list:
+        # Refresh every supported coin so on-demand price reads hit the fresh store
+        prices = await self.price_service.get_live_prices()
+        return [
+            {
+                'symbol': coin['symbol'],
+                'price': coin['price'],
+                'change': coin.get('change_24h', 0),
+                'type': 'crypto'
+            }
+            for coin in prices.get('crypto', []) if coin['id'] in self.coin_ids
+        ]
+
+class SimulatedQuoteSource(QuoteSource):
+    """Simulated stock quotes; changes are drawn once per tick so every client sees the same values"""
+    
+    def __init__(self, listings: list = None):
+        self.listings = listings or SIMULATED_LISTINGS
+    
+    async def fetch(self) -> list:
+        return [
+            {
+                'symbol': listing['symbol'],
+                'name': listing['name'],
+                'price': listing['price'],
+                'change': round(random.uniform(-listing['volatility'], listing['volatility']), 2),
+                'type': listing['type']
+            }
+            for listing in self.listings
+        ]
+
+class TickerHub:
+    """In-process broadcast of ticker snapshots; one publish per tick serves every subscriber
+    
+    Each tick bumps a global version. Per category the hub keeps the latest items, their
+    delta from the previous tick, and every wire format already encoded (REST body, SSE
+    frame, WebSocket snapshot/delta), so serving a client never re-serializes. Clients one
+    version behind get the shared delta and anyone further behind the full snapshot.
+    """
+    
+    def __init__(self):
+        self.version = 0
+        self.updated_at = None
+        self._snapshots = {}  # category -> list of ticker items
+        self._encoded = {}  # category -> {'body', 'sse', 'snapshot', 'delta'}
+        self._tick = asyncio.Event()
+        self.subscribers = 0
+    
+    def publish(self, snapshots: dict):
+        """Replace every category's snapshot, encode it once and wake all waiting subscribers"""
+        version = self.version + 1
+        for category, items in snapshots.items():
+            previous = {item['symbol']: item for item in self._snapshots.get(category, [])}
+            current = {item['symbol']: item for item in items}
+            changed = [item for symbol, item in current.items() if previous.get(symbol) != item]
+            removed = [symbol for symbol in previous if symbol not in current]
+            
+            snapshot = json.dumps({'type': 'snapshot', 'category': category, 'version': version, 'ticker': items})
+            self._encoded[category] = {
+                'body': json.dumps({'ticker': items}).encode(),
+                'sse': f"id: {version}\nevent: ticker\ndata: {snapshot}\n\n",
+                'snapshot': snapshot,
+                'delta': json.dumps({
+                    'type': 'delta', 'category': category, 'version': version,
+                    'changed': changed, 'removed': removed
+                }) if changed or removed else None
+            }
+            self._snapshots[category] = items
+        
+        self.version = version
+        self.updated_at = datetime.now(timezone.utc)
+        
+        # Swap in a fresh event first so waiters woken now block on the next tick
+        tick, self._tick = self._tick, asyncio.Event()
+        tick.set()
+    
+    def snapshot(self, category: str):
+        return self._snapshots.get(category)
+    
+    def encoded(self, category: str, kind: str):
+        """Pre-encoded payload for category: 'body', 'sse', 'snapshot' or 'delta' (None if absent)"""
+        encoded = self._encoded.get(category)
+        return encoded[kind] if encoded else None
+    
+    async def wait(self, version: int, timeout: float = None) -> int:
+        """Wait until the hub is past version (or timeout) and return the current version"""
+        if self.version <= version:
+            try:
+                await asyncio.wait_for(self._tick.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.version
+
+class TickerSnapshotService:
+    """Computes every category's ticker once per tick from pluggable quote sources"""
+    
+    def __init__(self, sources: list, hub: TickerHub):
+        self.sources = sources
+        self.hub = hub
+        self._last = [[] for _ in sources]  # last good items per source
+    
+    async def refresh(self):
+        results = await asyncio.gather(*(source.fetch() for source in self.sources), return_exceptions=True)
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                # Keep the source's previous quotes rather than dropping its symbols
+                logger.error(f"{type(self.sources[index]).__name__} failed: {str(result)}")
+            else:
+                self._last[index] = result
+        
+        by_type = {}
+        for items in self._last:
+            for item in items:
+                by_type.setdefault(item['type'], []).append(item)
+        
+        self.hub.publish({
+            category: [item for quote_type in types for item in by_type.get(quote_type, [])]
+            for category, types in TICKER_CATEGORY_TYPES.items()
+        })
+    
+    async def ensure_ready(self):
+        """Publish a first snapshot if the poller hasn't yet; concurrent callers share one refresh"""
+        if not self.hub.version:
+            await self._first_refresh()
+    
+    @cached(ttl=60, key=lambda self: str(id(self)), cache=local_cache)
+    async def _first_refresh(self):
+        await self.refresh()
+
+class PricePoller:
+    """Background task that owns upstream price refresh and publishes ticker snapshots
+    
+    Listeners are async callables run after every refresh (e.g. alert evaluation).
+    """
+    
+    def __init__(self, snapshot_service: TickerSnapshotService, interval: float = None, listeners: list = None):
+        self.snapshot_service = snapshot_service
+        self.interval = interval or float(os.environ.get('TICKER_POLL_INTERVAL', 15))
+        self.listeners = listeners or []
+        self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.snapshot_service.refresh()
+            except Exception as e:
+                logger.error(f"Price poller error: {str(e)}")
+            for listener in self.listeners:
+                try:
+                    await listener()
+                except Exception as e:
+                    logger.error(f"Price poller listener error: {str(e)}")
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Price poller started ({self.interval}s interval)")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+async def stream_ticker_sse(hub: TickerHub, category: str, is_disconnected, keepalive: float = 15):
+    """Server-sent events: the current snapshot, then one snapshot per tick"""
+    version = -1
+    hub.subscribers += 1
+    try:
+        while not await is_disconnected():
+            current = await hub.wait(version, keepalive)
+            if current == version:
+                yield ': keepalive\n\n'
+                continue
+            version = current
+            frame = hub.encoded(category, 'sse')
+            if frame is not None:
+                yield frame
+    finally:
+        hub.subscribers -= 1
+
+async def serve_ticker_websocket(hub: TickerHub, websocket):
+    """WebSocket ticker with per-category subscriptions and delta updates
+    
+    Client messages: {"subscribe": [categories]} / {"unsubscribe": [categories]}.
+    Each newly subscribed category gets a full snapshot, then only deltas
+    ({"type": "delta", "changed": [...], "removed": [symbols]}) on later ticks.
+    """
+    await websocket.accept()
+    sent_versions = {}  # category -> hub version last sent to this client
+    hub.subscribers += 1
+    
+    async def read_commands():
+        while True:
+            message = await websocket.receive_json()
+            for category in message.get('subscribe', []):
+                if category in TICKER_CATEGORY_TYPES:
+                    sent_versions.setdefault(category, -1)
+            for category in message.get('unsubscribe', []):
+                sent_versions.pop(category, None)
+            changed.set()
+    
+    changed = asyncio.Event()
+    reader = asyncio.create_task(read_commands())
+    try:
+        while not reader.done():
+            # Clear and read the version before sending: subscription changes and ticks that
+            # land during the sends below must wake the next pass, not be lost
+            changed.clear()
+            seen = hub.version
+            for category, sent in list(sent_versions.items()):
+                version = hub.version  # the payload read below belongs to this version
+                if hub.snapshot(category) is None or sent == version:
+                    continue
+                if sent == version - 1:
+                    payload = hub.encoded(category, 'delta')
+                else:
+                    payload = hub.encoded(category, 'snapshot')
+                if payload is not None:
+                    await websocket.send_text(payload)
+                sent_versions[category] = version
+            
+            # Wake on the next tick or when the client changes its subscriptions
+            waiters = {asyncio.create_task(hub.wait(seen)), asyncio.create_task(changed.wait())}
+            await asyncio.wait(waiters | {reader}, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waiters:
+                waiter.cancel()
+    finally:
+        hub.subscribers -= 1
+        reader.cancel()
+        if reader.done() and not reader.cancelled() and reader.exception() is not None:
+            logger.debug(f"Ticker websocket closed: {str(reader.exception())}")
+
+# Global hub instance
+ticker_hub = TickerHub()
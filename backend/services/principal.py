@@ -0,0 +1,86 @@
+import hashlib
+import os
+import time
+import logging
+from .cache_service import CacheService, cache_service
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEY = "user:profile:{}"
+
+class VerifiedTokenCache:
+    """LRU of already-verified JWTs, keyed by token hash and expiring with the token's exp
+    
+    A dedicated CacheService so a burst of sessions can't evict data entries. Only
+    successful verifications are stored; raw tokens are never kept in memory.
+    """
+    
+    def __init__(self, max_entries: int = None):
+        max_entries = max_entries or int(os.environ.get('JWT_CACHE_SIZE', 10000))
+        self._cache = CacheService(max_entries=max_entries, max_bytes=max_entries * 1024)
+    
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def get(self, token: str):
+        """User id of a cached, unexpired token, else None"""
+        return self._cache.get(self._key(token))
+    
+    def put(self, token: str, user_id: str, exp: float = None):
+        if exp is None:
+            return  # tokens without exp are never cached
+        ttl = exp - time.time()
+        if ttl > 0:
+            self._cache.set(self._key(token), user_id, ttl)
+    
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+async def invalidate_user_profile(user_id: str):
+    """Drop a cached profile on every worker; call after any write to the user doc"""
+    await cache_service.adelete(PROFILE_KEY.format(user_id))
+
+class UserProfileStore:
+    """User docs (without password_hash) behind a short-TTL cache; USER_PROFILE_TTL=0 disables it"""
+    
+    PROJECTION = {"_id": 0, "password_hash": 0}
+    
+    def __init__(self, db, ttl: float = None):
+        self.db = db
+        self.ttl = ttl if ttl is not None else float(os.environ.get('USER_PROFILE_TTL', 30))
+    
+    async def get(self, user_id: str):
+        if self.ttl <= 0:
+            return await self.db.users.find_one({"id": user_id}, self.PROJECTION)
+        
+        key = PROFILE_KEY.format(user_id)
+        user = await cache_service.aget(key)
+        if user is None:
+            user = await self.db.users.find_one({"id": user_id}, self.PROJECTION)
+            if user is not None:
+                await cache_service.aset(key, user, self.ttl)
+        return user
+    
+    async def invalidate(self, user_id: str):
+        await invalidate_user_profile(user_id)
+
+class Principal:
+    """The authenticated caller of one request; the user doc is loaded at most once"""
+    
+    def __init__(self, user_id: str, profiles: UserProfileStore):
+        self.user_id = user_id
+        self._profiles = profiles
+        self._user = None
+        self._loaded = False
+    
+    async def user(self):
+        """The caller's user doc (shared with the profile cache; do not mutate), or None"""
+        if not self._loaded:
+            self._user = await self._profiles.get(self.user_id)
+            self._loaded = True
+        return self._user
+    
+    async def username(self, default: str = "Anonymous") -> str:
+        user = await self.user()
+        return (user or {}).get("username") or default
@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 import uuid
 import secrets
 import logging
+from .bson_dates import as_datetime
+from .principal import invalidate_user_profile
 
 logger = logging.getLogger(__name__)
 
@@ -73,9 +75,6 @@ class ReferralService:
             )
             
             doc = referral_code.model_dump()
-            doc["created_at"] = doc["created_at"].isoformat()
-            if doc.get("expires_at"):
-                doc["expires_at"] = doc["expires_at"].isoformat()
             
             await self.db.referral_codes.insert_one(doc)
             logger.info(f"Generated referral code {code} for user {user_id}")
@@ -97,7 +96,7 @@ class ReferralService:
                 raise ValueError("Referral code limit reached")
             
             if code_doc.get("expires_at"):
-                expires = datetime.fromisoformat(code_doc["expires_at"])
+                expires = as_datetime(code_doc["expires_at"])
                 if datetime.now(timezone.utc) > expires:
                     raise ValueError("Referral code expired")
             
@@ -111,9 +110,6 @@ class ReferralService:
             )
             
             doc = referral.model_dump()
-            doc["created_at"] = doc["created_at"].isoformat()
-            if doc.get("completed_at"):
-                doc["completed_at"] = doc["completed_at"].isoformat()
             
             await self.db.referrals.insert_one(doc)
             
@@ -128,6 +124,7 @@ class ReferralService:
                 {"id": referred_user_id},
                 {"$set": {"referred_by": code_doc["user_id"], "referral_code_used": referral_code}}
             )
+            await invalidate_user_profile(referred_user_id)
             
             logger.info(f"Applied referral code {referral_code} for user {referred_user_id}")
             return referral.id
@@ -148,7 +145,7 @@ class ReferralService:
                 {
                     "$set": {
                         "status": "completed",
-                        "completed_at": datetime.now(timezone.utc).isoformat()
+                        "completed_at": datetime.now(timezone.utc)
                     }
                 }
             )
@@ -162,9 +159,6 @@ class ReferralService:
             )
             
             doc = reward.model_dump()
-            doc["created_at"] = doc["created_at"].isoformat()
-            if doc.get("paid_at"):
-                doc["paid_at"] = doc["paid_at"].isoformat()
             
             await self.db.referral_rewards.insert_one(doc)
             
@@ -174,6 +168,7 @@ class ReferralService:
                     {"id": referral["referrer_id"]},
                     {"$inc": {"credits": referral["reward_amount"]}}
                 )
+                await invalidate_user_profile(referral["referrer_id"])
                 
                 # Update reward status
                 await self.db.referral_rewards.update_one(
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode
+import hashlib
+import logging
+from .cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ResponseCacheRule:
+    """Cache GET responses under a path; writes to the same path invalidate its tag"""
+    path: str
+    tag: str
+    ttl: int  # seconds the server keeps the serialized response
+    max_age: int  # seconds clients and proxies may reuse it (Cache-Control)
+    prefix: bool = False
+    
+    def matches(self, path: str) -> bool:
+        if self.prefix:
+            return path.startswith(self.path)
+        return path == self.path or path.startswith(self.path + '/')
+
+# First match wins, so specific paths go before their prefixes
+RESPONSE_CACHE_RULES = [
+    ResponseCacheRule('/api/investor/live-quote', 'investor-quote', ttl=30, max_age=15),
+    ResponseCacheRule('/api/investor/', 'investor', ttl=3600, max_age=300, prefix=True),
+    ResponseCacheRule('/api/strains', 'strains', ttl=600, max_age=60),
+    ResponseCacheRule('/api/media', 'media', ttl=600, max_age=60),
+    ResponseCacheRule('/api/press-releases', 'press-releases', ttl=600, max_age=60),
+    ResponseCacheRule('/api/affiliate/partners', 'affiliate-partners', ttl=120, max_age=60),
+]
+
+WRITE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+class ResponseCacheMiddleware:
+    """ASGI middleware caching serialized GET responses per route and query, with ETag/304
+    
+    Bodies are stored as bytes in cache_service under their rule's tag, so a successful
+    POST/PUT/PATCH/DELETE on a cached path drops every cached variant of it. HEAD is
+    served from the same entries without a body; other methods (OPTIONS) pass through.
+    """
+    
+    def __init__(self, app, rules: list = None, cache=None):
+        self.app = app
+        self.rules = rules if rules is not None else RESPONSE_CACHE_RULES
+        self.cache = cache or cache_service
+    
+    def _rule_for(self, path: str):
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return None
+    
+    async def invalidate(self, tag: str):
+        await self.cache.adelete_prefix(f"http:{tag}:")
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        rule = self._rule_for(scope['path'])
+        if rule is None:
+            return await self.app(scope, receive, send)
+        
+        if scope['method'] in WRITE_METHODS:
+            return await self._forward_write(rule, scope, receive, send)
+        if scope['method'] not in ('GET', 'HEAD'):
+            return await self.app(scope, receive, send)
+        head = scope['method'] == 'HEAD'
+        
+        query = urlencode(sorted(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True)))
+        key = f"http:{rule.tag}:{scope['path']}?{query}"
+        headers = {name.lower(): value for name, value in scope['headers']}
+        if_none_match = headers.get(b'if-none-match', b'').decode('latin-1')
+        
+        entry = await self.cache.aget(key)
+        if entry is not None:
+            status, response_headers, body, etag = entry
+            return await self._send(send, status, response_headers, body, etag, rule, if_none_match, b'HIT', head)
+        
+        # Buffer the downstream response so it can be stored
+        start = {}
+        chunks = []
+        
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+        
+        # HEAD misses are rendered as GET so the full body can be stored and hashed
+        await self.app(dict(scope, method='GET') if head else scope, receive, capture)
+        
+        body = b''.join(chunks)
+        status = start.get('status', 500)
+        response_headers = [
+            (name, value) for name, value in start.get('headers', [])
+            if name.lower() not in (b'content-length', b'etag', b'cache-control')
+        ]
+        if status != 200:
+            return await self._send(send, status, response_headers, body, None, None, '', b'BYPASS', head)
+        
+        etag = _etag(body)
+        await self.cache.aset(key, (status, response_headers, body, etag), rule.ttl)
+        await self._send(send, status, response_headers, body, etag, rule, if_none_match, b'MISS', head)
+    
+    async def _forward_write(self, rule, scope, receive, send):
+        async def watch(message):
+            # Invalidate before the client sees success, so its next GET can't hit the old entry
+            if message['type'] == 'http.response.start' and 200 <= message['status'] < 300:
+                await self.invalidate(rule.tag)
+            await send(message)
+        
+        await self.app(scope, receive, watch)
+    
+    async def _send(self, send, status, response_headers, body, etag, rule, if_none_match, cache_state, head=False):
+        headers = list(response_headers)
+        if etag:
+            headers.append((b'etag', etag.encode()))
+            headers.append((b'cache-control', f'public, max-age={rule.max_age}'.encode()))
+        headers.append((b'x-cache', cache_state))
+        
+        if etag and if_none_match and _etag_matches(if_none_match, etag):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        
+        headers.append((b'content-length', str(len(body)).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if head else body})
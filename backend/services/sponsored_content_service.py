@@ -76,10 +76,6 @@ class SponsoredContentService:
         try:
             content = SponsoredContent(**content_data)
             doc = content.model_dump()
-            doc["start_date"] = doc["start_date"].isoformat()
-            if doc.get("end_date"):
-                doc["end_date"] = doc["end_date"].isoformat()
-            doc["created_at"] = doc["created_at"].isoformat()
             
             await self.db.sponsored_content.insert_one(doc)
             logger.info(f"Created sponsored content: {content.id}")
@@ -98,9 +94,6 @@ class SponsoredContentService:
             
             listing = FeaturedListing(**listing_data)
             doc = listing.model_dump()
-            doc["start_date"] = doc["start_date"].isoformat()
-            doc["end_date"] = doc["end_date"].isoformat()
-            doc["created_at"] = doc["created_at"].isoformat()
             
             await self.db.featured_listings.insert_one(doc)
             logger.info(f"Created featured listing: {listing.id}")
@@ -120,7 +113,6 @@ class SponsoredContentService:
             )
             
             doc = impression.model_dump()
-            doc["timestamp"] = doc["timestamp"].isoformat()
             await self.db.ad_impressions.insert_one(doc)
             
             # Update content impressions and calculate cost
@@ -167,7 +159,6 @@ class SponsoredContentService:
             )
             
             doc = click.model_dump()
-            doc["timestamp"] = doc["timestamp"].isoformat()
             await self.db.ad_clicks.insert_one(doc)
             
             # Update content clicks and calculate cost
@@ -223,7 +214,7 @@ class SponsoredContentService:
     async def get_featured_listings(self, item_type: str, limit: int = 3):
         """Get active featured listings"""
         try:
-            now = datetime.now(timezone.utc).isoformat()
+            now = datetime.now(timezone.utc)
             content = await self.db.featured_listings.find(
                 {
                     "item_type": item_type,
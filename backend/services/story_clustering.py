@@ -0,0 +1,134 @@
+import numpy as np
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import re
+import logging
+from .bson_dates import as_datetime
+
+logger = logging.getLogger(__name__)
+
+class StoryClusterIndex:
+    """Near-duplicate story detection with MinHash signatures and an in-memory LSH index"""
+    
+    NUM_PERM = 64
+    BANDS = 16  # 16 bands x 4 rows -> candidate pairs from ~0.5 Jaccard upwards
+    ROWS = NUM_PERM // BANDS
+    SHINGLE_SIZE = 5  # character shingles, robust to small title rewrites
+    SIMILARITY_THRESHOLD = 0.6
+    RETENTION_DAYS = 30
+    
+    _PRIME = (1 << 32) - 5
+    _rng = np.random.default_rng(20240607)  # fixed seed: persisted signatures must stay comparable
+    _A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+    _B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+    
+    def __init__(self):
+        self._signatures = {}  # article id -> np.ndarray signature
+        self._clusters = {}  # article id -> cluster id
+        self._published = {}  # article id -> published_at datetime
+        self._buckets = defaultdict(set)  # (band, band hash) -> article ids
+        self._loaded = False
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(re.sub(r'[^a-z0-9 ]+', ' ', text.lower()).split())
+    
+    @classmethod
+    def signature(cls, text: str) -> np.ndarray:
+        """MinHash signature over character shingles of the text"""
+        text = cls._normalize(text)
+        if len(text) < cls.SHINGLE_SIZE:
+            text = text.ljust(cls.SHINGLE_SIZE)
+        shingles = {text[i:i + cls.SHINGLE_SIZE] for i in range(len(text) - cls.SHINGLE_SIZE + 1)}
+        
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), 'little') for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # a*x + b stays below 2**64 because a, b and x are all < 2**32
+        permuted = (cls._A[:, None] * hashes[None, :] + cls._B[:, None]) % cls._PRIME
+        return permuted.min(axis=1)
+    
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.BANDS):
+            rows = signature[band * self.ROWS:(band + 1) * self.ROWS]
+            yield band, rows.tobytes()
+    
+    def _add(self, article_id: str, signature: np.ndarray, cluster_id: str, published_at: datetime):
+        self._signatures[article_id] = signature
+        self._clusters[article_id] = cluster_id
+        self._published[article_id] = published_at
+        for key in self._band_keys(signature):
+            self._buckets[key].add(article_id)
+    
+    def _remove(self, article_id: str):
+        signature = self._signatures.pop(article_id)
+        self._clusters.pop(article_id, None)
+        self._published.pop(article_id, None)
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                bucket.discard(article_id)
+                if not bucket:
+                    del self._buckets[key]
+    
+    def __contains__(self, article_id):
+        return article_id in self._signatures
+    
+    def find_cluster(self, signature: np.ndarray):
+        """Return the cluster id of the most similar indexed story, if similar enough"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        
+        best_id, best_score = None, self.SIMILARITY_THRESHOLD
+        for candidate in candidates:
+            score = float(np.mean(self._signatures[candidate] == signature))
+            if score >= best_score:
+                best_id, best_score = candidate, score
+        
+        return self._clusters[best_id] if best_id else None
+    
+    async def ensure_loaded(self, db):
+        """Rebuild the index from signatures persisted on recent articles"""
+        if self._loaded:
+            return
+        
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.RETENTION_DAYS)
+        cursor = db.news_articles.find(
+            {'minhash': {'$exists': True}, 'published_at': {'$gte': cutoff}},
+            {'_id': 0, 'id': 1, 'minhash': 1, 'cluster_id': 1, 'published_at': 1}
+        )
+        async for doc in cursor:
+            self._add(
+                doc['id'],
+                np.array(doc['minhash'], dtype=np.uint64),
+                doc.get('cluster_id', doc['id']),
+                as_datetime(doc['published_at'], cutoff)
+            )
+        
+        self._loaded = True
+        logger.info(f"Loaded {len(self._signatures)} story signatures into cluster index")
+    
+    def prune(self):
+        """Drop signatures that have aged out of the retention window"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.RETENTION_DAYS)
+        expired = [article_id for article_id, published in self._published.items() if published < cutoff]
+        for article_id in expired:
+            self._remove(article_id)
+    
+    def assign(self, article: dict):
+        """Attach minhash, cluster_id and cluster_rep to a new article and index it"""
+        signature = self.signature(article['title'])
+        cluster_id = self.find_cluster(signature)
+        
+        article['minhash'] = [int(value) for value in signature]
+        article['cluster_id'] = cluster_id or article['id']
+        article['cluster_rep'] = cluster_id is None  # first story seen represents its cluster
+        
+        self._add(article['id'], signature, article['cluster_id'], as_datetime(article['published_at']))
+
+# Global cluster index instance
+story_cluster_index = StoryClusterIndex()
@@ -0,0 +1,222 @@
+from bisect import bisect_left
+from collections import Counter
+import numpy as np
+import asyncio
+import heapq
+import math
+import re
+import time
+import logging
+from .cache_service import cached, local_cache
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Field boosts for the weighted term frequency (BM25F-style, one length norm per strain)
+FIELD_WEIGHTS = {'name': 3.0, 'effects': 1.5, 'flavors': 1.5, 'lineage': 1.0, 'description': 1.0}
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(text.lower())
+
+def _trigrams(term: str) -> set:
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, giving up (limit + 1) once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _field_text(strain: dict, field: str) -> str:
+    if field == 'name':
+        return f"{strain.get('name') or ''} {strain.get('aka') or ''}"
+    value = strain.get(field)
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    if isinstance(value, dict):  # lineage: {parents, breeder, origin_country, ...}
+        return ' '.join(str(item) for item in value.values() if item)
+    return str(value or '')
+
+class StrainIndex:
+    """Immutable inverted index over a strain catalog
+    
+    Postings hold each strain's precomputed BM25 contribution, so a query is one
+    scatter-add per matched term. Query terms also match by prefix (the last term, for
+    type-ahead) and, when absent from the vocabulary, by trigram candidates confirmed
+    with an edit distance of 1-2. A query that matches no term falls back to a
+    case-insensitive substring scan of names, as the old regex search did.
+    """
+    
+    K1 = 1.2
+    B = 0.75
+    PREFIX_EXPANSIONS = 20
+    FUZZY_CANDIDATES = 50
+    FUZZY_EXPANSIONS = 3
+    
+    def __init__(self, strains: list, generation: int = 0):
+        self.strains = strains
+        self.generation = generation  # catalog writes seen when the build started
+        self.types = [strain.get('type') for strain in strains]
+        self.names = [str(strain.get('name') or '').lower() for strain in strains]
+        
+        frequencies = []
+        lengths = np.zeros(len(strains))
+        for i, strain in enumerate(strains):
+            weighted = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                tokens = tokenize(_field_text(strain, field))
+                for token in tokens:
+                    weighted[token] += weight
+                lengths[i] += weight * len(tokens)
+            frequencies.append(weighted)
+        
+        postings = {}
+        for i, weighted in enumerate(frequencies):
+            for term, tf in weighted.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(i)
+                postings[term][1].append(tf)
+        
+        count = len(strains)
+        avg_length = lengths.mean() if count else 0.0
+        norms = self.K1 * (1 - self.B + self.B * lengths / avg_length) if count else lengths
+        self.postings = {}
+        for term, (ids, tfs) in postings.items():
+            ids = np.asarray(ids, dtype=np.int32)
+            tfs = np.asarray(tfs, dtype=np.float64)
+            idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            self.postings[term] = (ids, (idf * tfs * (self.K1 + 1) / (tfs + norms[ids])).astype(np.float32))
+        
+        self.vocabulary = sorted(self.postings)
+        self._trigram_terms = {}  # trigram -> vocabulary indexes
+        for index, term in enumerate(self.vocabulary):
+            for gram in _trigrams(term):
+                self._trigram_terms.setdefault(gram, []).append(index)
+    
+    def _expand(self, token: str, prefix: bool) -> dict:
+        """Index terms a query token matches, with a weight in (0, 1]"""
+        expansions = {}
+        if token in self.postings:
+            expansions[token] = 1.0
+        
+        if prefix and len(token) >= 2:
+            start = bisect_left(self.vocabulary, token)
+            for term in self.vocabulary[start:start + self.PREFIX_EXPANSIONS + 1]:
+                if not term.startswith(token):
+                    break
+                expansions.setdefault(term, 0.8)
+        
+        if not expansions and len(token) >= 3:
+            # Typo tolerance: rank vocabulary terms by shared trigrams, confirm by edit distance
+            shared = Counter()
+            for gram in _trigrams(token):
+                shared.update(self._trigram_terms.get(gram, ()))
+            limit = 1 if len(token) <= 5 else 2
+            fuzzy = []
+            for index, _ in shared.most_common(self.FUZZY_CANDIDATES):
+                term = self.vocabulary[index]
+                distance = _edit_distance(token, term, limit)
+                if distance <= limit:
+                    fuzzy.append((distance, term))
+            for distance, term in sorted(fuzzy)[:self.FUZZY_EXPANSIONS]:
+                expansions[term] = 0.6 if distance == 1 else 0.4
+        return expansions
+    
+    def search(self, query: str, strain_type: str = None, limit: int = 100) -> list:
+        tokens = tokenize(query)
+        if not tokens or not self.strains:
+            return []
+        
+        scores = np.zeros(len(self.strains), dtype=np.float32)
+        for position, token in enumerate(tokens):
+            # A token scores each strain by its best-matching expansion, not their sum
+            token_scores = np.zeros_like(scores)
+            for term, weight in self._expand(token, prefix=position == len(tokens) - 1).items():
+                ids, contributions = self.postings[term]
+                token_scores[ids] = np.maximum(token_scores[ids], contributions * weight)
+            scores += token_scores
+        
+        candidates = np.flatnonzero(scores).tolist()
+        if not candidates:
+            # Mid-word fragments ("ush" for Kush) aren't terms or prefixes; scan names instead
+            needle = query.strip().lower()
+            candidates = [i for i, name in enumerate(self.names) if needle in name]
+            scores[candidates] = 1.0
+        if strain_type:
+            candidates = [i for i in candidates if self.types[i] == strain_type]
+        top = heapq.nlargest(limit, candidates, key=lambda i: (scores[i], -i))
+        return [self.strains[i] for i in top]
+
+class StrainSearchService:
+    """Serves strain search from an in-memory StrainIndex over the `strains` collection
+    
+    The index is built on first use and refreshed in the background after writes on this
+    worker, or once older than MAX_AGE so other workers' writes show up too. Searches keep
+    using the previous index while a rebuild runs; `on_rebuilt` (a coroutine function) is
+    awaited once a rebuild covering every local write is in place.
+    """
+    
+    MAX_AGE = 300  # seconds
+    SEARCH_LIMIT = 100
+    
+    def __init__(self, db, on_rebuilt=None):
+        self.db = db
+        self.on_rebuilt = on_rebuilt
+        self._generation = 0  # bumped on every local catalog write
+        self._hooks = set()
+    
+    @cached(ttl=MAX_AGE, stale_ttl=365 * 86400, key=lambda self: str(id(self)), cache=local_cache)
+    async def _current_index(self) -> StrainIndex:
+        generation = self._generation
+        strains = await self.db.strains.find({}, {"_id": 0}).to_list(None)
+        started = time.perf_counter()
+        # Tokenizing a large catalog is CPU-bound; keep it off the event loop
+        index = await asyncio.to_thread(StrainIndex, strains, generation)
+        logger.info(f"Built strain search index: {len(strains)} strains, {len(index.postings)} terms in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return index
+    
+    def rebuild(self):
+        """Rebuild in the background after a write; returns the future of the build"""
+        self._generation += 1
+        return self._refresh()
+    
+    def _refresh(self):
+        future = self._current_index.refresh(self)
+        future.add_done_callback(self._after_build)
+        return future
+    
+    def _after_build(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error(f"Error rebuilding strain search index: {str(future.exception())}")
+        elif future.result().generation != self._generation:
+            # A write landed after this build read the catalog (it joined a running build)
+            asyncio.get_running_loop().call_soon(self._refresh)
+        elif self.on_rebuilt is not None:
+            task = asyncio.ensure_future(self._notify())
+            self._hooks.add(task)
+            task.add_done_callback(self._hooks.discard)
+    
+    async def _notify(self):
+        try:
+            await self.on_rebuilt()
+        except Exception as e:
+            logger.error(f"Error in strain index rebuild hook: {str(e)}")
+    
+    async def search(self, query: str, strain_type: str = None, limit: int = None) -> list:
+        index = await self._current_index()
+        return index.search(query, strain_type, limit or self.SEARCH_LIMIT)
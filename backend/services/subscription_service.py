@@ -5,6 +5,7 @@ from typing import Optional, List
 from datetime import datetime, timezone, timedelta
 import uuid
 import logging
+from .principal import invalidate_user_profile
 
 logger = logging.getLogger(__name__)
 
@@ -108,6 +109,7 @@ class SubscriptionService:
                     {"id": user_id},
                     {"$set": {"stripe_customer_id": customer_id}}
                 )
+                await invalidate_user_profile(user_id)
             
             # Create checkout session
             session = stripe.checkout.Session.create(
@@ -166,15 +168,13 @@ class SubscriptionService:
         )
         
         doc = subscription.model_dump()
-        doc["current_period_start"] = doc["current_period_start"].isoformat()
-        doc["current_period_end"] = doc["current_period_end"].isoformat()
-        doc["created_at"] = doc["created_at"].isoformat()
         
         await self.db.subscriptions.insert_one(doc)
         await self.db.users.update_one(
             {"id": user_id},
             {"$set": {"subscription_plan": plan_id}}
         )
+        await invalidate_user_profile(user_id)
     
     async def _update_subscription_status(self, subscription):
         """Update subscription status"""
@@ -49,7 +49,7 @@ async def setup_affiliate_system():
             'partner_id': partner['id'],
             'partner_name': partner['name'],
             'source_page': random.choice(['news', 'strains', 'seeds', 'home']),
-            'clicked_at': click_date.isoformat(),
+            'clicked_at': click_date,
             'ip_address': f'192.168.{random.randint(1,255)}.{random.randint(1,255)}',
             'converted': False,
             'revenue': 0
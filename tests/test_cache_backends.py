@@ -0,0 +1,91 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from services.cache_backends import CacheBackend, RedisCacheBackend
+from services.cache_service import CacheService
+
+def _worker(server):
+    """A CacheService as one uvicorn worker would have it, over a shared fake Redis"""
+    backend = RedisCacheBackend(fakeredis.aioredis.FakeRedis(server=server))
+    return CacheService(max_entries=100, backend=backend)
+
+async def _until(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+def test_aget_reads_through_to_shared_backend():
+    async def run():
+        server = fakeredis.FakeServer()
+        first, second = _worker(server), _worker(server)
+        
+        await first.aset('quote:bitcoin', {'price': 1.5, 'tags': ('a', b'b')}, 60)
+        assert second.get('quote:bitcoin') is None  # not in the other worker's L1 yet
+        assert await second.aget('quote:bitcoin') == {'price': 1.5, 'tags': ('a', b'b')}
+        assert second.l2_hits == 1
+        assert second.get('quote:bitcoin') == {'price': 1.5, 'tags': ('a', b'b')}  # promoted to L1
+        
+        assert await second.aget('quote:missing') is None
+        assert second.l2_misses == 1
+        
+        await first.close()
+        await second.close()
+    
+    asyncio.run(run())
+
+def test_adelete_prefix_clears_shared_backend():
+    async def run():
+        server = fakeredis.FakeServer()
+        first, second = _worker(server), _worker(server)
+        
+        await first.aset('http:strains:/api/strains?', b'[]', 60)
+        await first.aset('http:strains:/api/strains?search=kush', b'[]', 60)
+        await first.aset('http:media:/api/media?', b'[]', 60)
+        
+        await first.adelete_prefix('http:strains:')
+        assert await second.aget('http:strains:/api/strains?') is None
+        assert await second.aget('http:strains:/api/strains?search=kush') is None
+        assert await second.aget('http:media:/api/media?') == b'[]'
+        
+        await first.close()
+        await second.close()
+    
+    asyncio.run(run())
+
+def test_invalidations_reach_other_workers():
+    async def run():
+        server = fakeredis.FakeServer()
+        first, second = _worker(server), _worker(server)
+        await first.start()
+        await second.start()
+        await asyncio.sleep(0.1)  # let both listeners subscribe
+        
+        await first.aset('user:profile:1', {'username': 'old'}, 60)
+        await first.aset('http:strains:/api/strains?', b'[]', 60)
+        assert await second.aget('user:profile:1') == {'username': 'old'}
+        assert await second.aget('http:strains:/api/strains?') == b'[]'
+        
+        # A write on one worker drops the other worker's L1 copy
+        await first.aset('user:profile:1', {'username': 'new'}, 60)
+        await _until(lambda: second.get('user:profile:1') is None)
+        assert await second.aget('user:profile:1') == {'username': 'new'}
+        
+        await first.adelete_prefix('http:strains:')
+        await _until(lambda: second.get('http:strains:/api/strains?') is None)
+        
+        # A worker ignores its own messages, so its fresh L1 entry survives
+        await second.aset('user:profile:2', {'username': 'kept'}, 60)
+        await asyncio.sleep(0.1)
+        assert second.get('user:profile:2') == {'username': 'kept'}
+        
+        await first.close()
+        await second.close()
+    
+    asyncio.run(run())
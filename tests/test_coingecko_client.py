@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services.coingecko_client import CoinGeckoClient, TokenBucket, fixture_transport
+
+def _client(fixtures: dict) -> CoinGeckoClient:
+    client = CoinGeckoClient(rate_per_minute=6000, transport=fixture_transport(fixtures))
+    client.BACKOFF_BASE = 0.001  # keep retries fast
+    return client
+
+def _sequence(*responses):
+    """Fixture answering each request with the next response (a payload, Response or exception)"""
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        response = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+    
+    return handler, calls
+
+def test_fixture_transport_serves_payloads_offline():
+    async def run():
+        client = _client({'/simple/price': lambda request: {'bitcoin': {'usd': float(request.url.params['ids'] == 'bitcoin')}}})
+        assert await client.get_price('bitcoin') == {'bitcoin': {'usd': 1.0}}
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_coins_list()  # no fixture: 404, not retried
+        await client.aclose()
+    
+    asyncio.run(run())
+
+def test_retries_429_honouring_retry_after():
+    handler, calls = _sequence(
+        httpx.Response(429, headers={'Retry-After': '0'}),
+        {'coins': []}
+    )
+    
+    async def run():
+        client = _client({'/search/trending': handler})
+        assert await client.get_search_trending() == {'coins': []}
+        await client.aclose()
+    
+    asyncio.run(run())
+    assert len(calls) == 2
+
+def test_retries_server_and_network_errors_then_gives_up():
+    handler, calls = _sequence(
+        httpx.ConnectError('connection refused'),
+        httpx.Response(502),
+        httpx.Response(503)
+    )
+    
+    async def run():
+        client = _client({'/coins/list': handler})
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            await client.get_coins_list()
+        await client.aclose()
+        return error.value.response.status_code
+    
+    assert asyncio.run(run()) == 503
+    assert len(calls) == CoinGeckoClient.MAX_RETRIES + 1
+
+def test_client_errors_are_not_retried():
+    handler, calls = _sequence(httpx.Response(400, json={'error': 'invalid vs_currency'}))
+    
+    async def run():
+        client = _client({'/exchange_rates': handler})
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_exchange_rates()
+        await client.aclose()
+    
+    asyncio.run(run())
+    assert len(calls) == 1
+
+def test_backoff_is_exponential_jittered_and_capped():
+    client = CoinGeckoClient()
+    for attempt in range(4):
+        delay = client._backoff(attempt)
+        full = client.BACKOFF_BASE * 2 ** attempt
+        assert full / 2 <= delay <= full
+    assert client._backoff(20) <= client.BACKOFF_MAX
+    
+    assert client._backoff(0, httpx.Response(429, headers={'Retry-After': '7'})) == 7.0
+    assert client._backoff(0, httpx.Response(429, headers={'Retry-After': '3600'})) == client.BACKOFF_MAX
+
+def test_token_bucket_allows_burst_then_paces():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=2)
+        started = time.monotonic()
+        for _ in range(2):
+            await bucket.acquire()
+        burst = time.monotonic() - started
+        
+        for _ in range(3):
+            await bucket.acquire()
+        return burst, time.monotonic() - started
+    
+    burst, total = asyncio.run(run())
+    assert burst < 0.01
+    assert total >= 3 / 50 * 0.9  # three more tokens at 50/s
+
+def test_token_bucket_serves_concurrent_callers_in_order():
+    async def run():
+        bucket = TokenBucket(rate=100, capacity=1)
+        order = []
+        
+        async def caller(index):
+            await bucket.acquire()
+            order.append(index)
+        
+        await asyncio.gather(*(caller(index) for index in range(5)))
+        return order
+    
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]